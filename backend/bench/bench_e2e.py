@@ -0,0 +1,335 @@
+# Offline end-to-end benchmark: scrape_luma_event and the CLI against local Luma fixtures
+#
+# Usage: python bench/bench_e2e.py [--sizes 20,200,2000] [--modes api,cli] [--latency-ms 0]
+#                                  [--json results.json] [--baseline previous.json]
+#
+# Needs Chrome + chromedriver (as in production) but no network access: Luma pages, the
+# guest-list API and the n8n webhook are served by bench/luma_fixtures.py. Scraper
+# settings (GUEST_LIST_MODE, PROFILE_FETCH_MODE, PROFILE_CONCURRENCY, ...) are read
+# from the environment as usual, so the same run can compare configurations.
+
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+import argparse
+import functools
+import json
+import os
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from luma_fixtures import LumaFixtureServer
+from chrome_memory import process_tree_rss_mb
+
+BENCH_COOKIES = [{"name": "luma.auth-session-key", "value": "bench-session", "path": "/"}]
+
+
+class StageRecorder:
+    """Collects per-stage latencies and chromedriver command counts inside the scraper process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = defaultdict(list)
+        self.commands = Counter()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.stages[stage].append(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed(self, name, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def timed_stream(self, name, fn):
+        """Time a generator-returning function from the call until the stream is exhausted"""
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            stream = fn(*args, **kwargs)
+            if stream is None:
+                self.add(name + "_miss", time.perf_counter() - start)
+                return None
+            return self._drain(name, start, stream)
+        return wrapper
+
+    def _drain(self, name, start, stream):
+        try:
+            yield from stream
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def summary(self):
+        with self._lock:
+            return {
+                "stages": {name: summarize(samples) for name, samples in self.stages.items()},
+                "commands": dict(self.commands.most_common()),
+            }
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "total": sum(ordered),
+        "p50": pick(0.5),
+        "p95": pick(0.95),
+        "max": ordered[-1],
+    }
+
+
+def instrument(recorder, base_url):
+    """Wrap chromedriver commands and scraper stages before the scraper modules are imported.
+
+    Names are patched on their defining modules, so the ``from x import y``
+    in scraper_api.py and luma_scraper.py pick up the timed versions.
+    """
+    from selenium import webdriver
+    from selenium.webdriver.remote.webdriver import WebDriver
+    import guest_capture
+    import guest_modal
+    import http_profile
+    import luma_session
+    import profile_fetcher
+    import webhook_outbox
+
+    execute = WebDriver.execute
+
+    def timed_execute(self, driver_command, params=None):
+        recorder.commands[driver_command] += 1
+        if driver_command != "get":
+            return execute(self, driver_command, params)
+        url = (params or {}).get("url", "")
+        path = url[len(base_url):] if url.startswith(base_url) else url
+        page = "profile" if path.startswith("/user/") else "home" if path in ("", "/") else "event"
+        with recorder.stage(f"page_load_{page}"):
+            return execute(self, driver_command, params)
+
+    WebDriver.execute = timed_execute
+    webdriver.Chrome.__init__ = recorder.timed("browser_launch", webdriver.Chrome.__init__)
+    luma_session.LumaSession.apply_to_driver = recorder.timed("cookie_login", luma_session.LumaSession.apply_to_driver)
+    luma_session.LumaSession.validate = recorder.timed("session_check", luma_session.LumaSession.validate)
+    guest_capture.capture_guest_list = recorder.timed_stream("guest_list_network", guest_capture.capture_guest_list)
+    guest_modal.iter_modal_guests = recorder.timed_stream("guest_list_modal", guest_modal.iter_modal_guests)
+    http_profile.HttpProfileFetcher.fetch = recorder.timed("profile_http", http_profile.HttpProfileFetcher.fetch)
+
+    stage_init = profile_fetcher.ProfileFetchStage.__init__
+
+    def timed_stage_init(self, scrape_profile, *args, **kwargs):
+        stage_init(self, recorder.timed("profile_chrome", scrape_profile), *args, **kwargs)
+
+    profile_fetcher.ProfileFetchStage.__init__ = timed_stage_init
+
+    deliver_next = webhook_outbox.WebhookOutbox._deliver_next
+
+    def timed_deliver_next(self):
+        start = time.perf_counter()
+        delivered = deliver_next(self)
+        if delivered:
+            recorder.add("webhook_post", time.perf_counter() - start)
+        return delivered
+
+    webhook_outbox.WebhookOutbox._deliver_next = timed_deliver_next
+
+
+def peak_rss_self_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def run_child(mode, event_url, stats_path):
+    """Run one scrape in this (fresh) process and write its measurements to ``stats_path``"""
+    recorder = StageRecorder()
+    instrument(recorder, os.environ["LUMA_BASE_URL"])
+    result = {"mode": mode}
+    start = time.perf_counter()
+    try:
+        if mode == "api":
+            import scraper_api
+            with recorder.stage("scrape_event"):
+                contacts = scraper_api.scrape_luma_event(event_url, force_refresh=True)
+            with recorder.stage("webhook_delivery"):
+                scraper_api.send_to_n8n({"event_url": event_url, "user_intent": "Benchmark run",
+                                         "contacts": contacts, "total_found": len(contacts)})
+                scraper_api.webhook_outbox.flush(timeout=120)
+            scraper_api.driver_pool.shutdown()
+            result["contacts"] = len(contacts)
+            result["enriched"] = sum(1 for c in contacts if c.get("profile_scraped"))
+        else:
+            sys.argv = [os.path.join(BACKEND_DIR, "luma_scraper.py"), event_url, "Benchmark run"]
+            runpy.run_path(sys.argv[0], run_name="__main__")
+    except BaseException as e:
+        result["error"] = repr(e)
+    result["wall"] = time.perf_counter() - start
+    result["python_peak_rss_mb"] = peak_rss_self_mb()
+    result.update(recorder.summary())
+    with open(stats_path, "w") as f:
+        json.dump(result, f)
+
+
+class TreeRssSampler:
+    """Samples the summed RSS of a process and all its descendants (Chrome, chromedriver)"""
+
+    def __init__(self, pid, interval=0.25):
+        self.pid = pid
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        if os.path.isdir("/proc"):
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            total = process_tree_rss_mb(self.pid)
+            if total:
+                self.peak_mb = max(self.peak_mb or 0, total)
+            self._stop.wait(self.interval)
+
+
+def run_case(server, mode, guests, timeout):
+    """Scrape one fixture event in a child process and collect its measurements"""
+    workdir = tempfile.mkdtemp(prefix="luma-bench-")
+    with open(os.path.join(workdir, "cookies.json"), "w") as f:
+        json.dump(BENCH_COOKIES, f)
+    stats_path = os.path.join(workdir, "stats.json")
+    log_path = os.path.join(workdir, "scraper.log")
+    env = {
+        **os.environ,
+        "LUMA_BASE_URL": server.base_url,
+        "LUMA_API_URL": server.base_url,
+        "N8N_WEBHOOK_URL": server.webhook_url,
+        "MAX_USERS": str(guests),
+        "HEADLESS": "1",
+        "RATE_LIMIT_RPS": os.environ.get("RATE_LIMIT_RPS", "0"),  # The fixtures never throttle
+        "PROFILE_CACHE_PATH": os.path.join(workdir, "profile_cache.db"),
+        "OUTBOX_PATH": os.path.join(workdir, "webhook_outbox.db"),
+        "PYTHONPATH": os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get("PYTHONPATH")])),
+    }
+    server.reset_stats()
+    print(f"⏱️  {mode} / {guests} guests...", flush=True)
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--child", mode, server.event_url(guests), stats_path],
+            cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+        with TreeRssSampler(proc.pid) as sampler:
+            try:
+                proc.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+
+    result = {"mode": mode, "guests": guests, "error": f"exit code {proc.returncode}"}
+    if os.path.exists(stats_path):
+        with open(stats_path) as f:
+            result = {**json.load(f), "guests": guests}
+    result["peak_rss_mb"] = sampler.peak_mb
+    fixtures = server.stats()
+    result["webhook"] = fixtures["webhook"]
+    result["requests"] = fixtures["requests"]
+    if result.get("error"):
+        result["log"] = log_path  # Keep the workdir for inspection
+        print(f"   ❌ {result['error']} (log: {log_path})")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def fmt_mb(value):
+    return f"{value:8.0f}" if value is not None else "     n/a"
+
+
+def print_report(results, baseline=None):
+    previous = {(r["mode"], r["guests"]): r for r in (baseline or [])}
+    print(f"\n{'mode':<5} {'guests':>6} {'wall s':>8} {'contacts':>8} {'enriched':>8} "
+          f"{'webhook':>8} {'commands':>8} {'peak MB':>8}")
+    for r in results:
+        line = (f"{r['mode']:<5} {r['guests']:>6} {r.get('wall', 0):8.1f} {r.get('contacts', '-'):>8} "
+                f"{r.get('enriched', '-'):>8} {r['webhook']['contacts']:>8} "
+                f"{sum(r.get('commands', {}).values()):>8} {fmt_mb(r.get('peak_rss_mb'))}")
+        before = previous.get((r["mode"], r["guests"]))
+        if before and before.get("wall") and r.get("wall"):
+            line += f"   wall {100 * (r['wall'] / before['wall'] - 1):+.0f}% vs baseline"
+        print(line)
+
+    for r in results:
+        if not r.get("stages"):
+            continue
+        print(f"\n📊 {r['mode']} / {r['guests']} guests - stage latency (s)")
+        print(f"   {'stage':<22} {'count':>6} {'total':>9} {'p50':>8} {'p95':>8} {'max':>8}")
+        for name, s in sorted(r["stages"].items(), key=lambda item: -item[1]["total"]):
+            print(f"   {name:<22} {s['count']:>6} {s['total']:9.2f} {s['p50']:8.3f} {s['p95']:8.3f} {s['max']:8.3f}")
+        top = ", ".join(f"{name}={count}" for name, count in list(r["commands"].items())[:8])
+        print(f"   chromedriver commands: {top}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run_child(*sys.argv[2:5])
+        return
+
+    parser = argparse.ArgumentParser(description="Offline end-to-end scraper benchmark")
+    parser.add_argument("--sizes", default="20,200,2000", help="Comma-separated attendee counts")
+    parser.add_argument("--modes", default="api,cli", help="api (scrape_luma_event) and/or cli (luma_scraper.py)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to every fixture response")
+    parser.add_argument("--timeout", type=int, default=3600, help="Seconds before a run is killed")
+    parser.add_argument("--json", help="Write the raw results here (e.g. to use as a later --baseline)")
+    parser.add_argument("--baseline", help="Results file from an earlier run to compare wall time against")
+    args = parser.parse_args()
+
+    server = LumaFixtureServer(latency=args.latency_ms / 1000).start()
+    print(f"🧪 Luma fixtures on {server.base_url}")
+    results = []
+    try:
+        for mode in args.modes.split(","):
+            for guests in [int(n) for n in args.sizes.split(",")]:
+                results.append(run_case(server, mode.strip(), guests, args.timeout))
+    finally:
+        server.stop()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
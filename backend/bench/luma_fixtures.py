@@ -0,0 +1,239 @@
+# Local stand-in for lu.ma and the n8n webhook, used by the offline benchmarks
+#
+# Run standalone to poke at the fixtures in a browser:
+#   python bench/luma_fixtures.py [port]   ->  http://127.0.0.1:<port>/bench-200
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from collections import Counter
+import html
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+EVENT_PATH_RE = re.compile(r"^/bench-(\d+)$")
+EVENT_API_ID_RE = re.compile(r"^evt-bench-(\d+)$")
+GUEST_PAGE_LIMIT = 20  # Rows the modal loads per scroll (the API allows up to 100)
+
+FIRST_NAMES = ["Silvia", "Marco", "Aisha", "Kenji", "Lena", "Omar", "Priya", "Jonas", "Chloe", "Diego"]
+LAST_NAMES = ["Mogas", "Rossi", "Khan", "Sato", "Berg", "Haddad", "Iyer", "Weber", "Martin", "Lopez"]
+TITLES = ["Founder & CEO", "Senior PM", "Staff Engineer", "Partner at Seed Fund", "Head of Growth"]
+BIOS = [
+    "Product Manager at Tech Company",
+    "Building developer tools for AI teams. Previously at a YC startup.",
+    "Early-stage investor in climate and fintech.",
+    "Full-stack engineer, open-source maintainer and meetup organizer.",
+    "Growth marketer helping B2B SaaS companies find their first 100 customers.",
+]
+
+
+def _load_template(name):
+    with open(os.path.join(FIXTURES_DIR, name)) as f:
+        return f.read()
+
+
+def _render(template, **values):
+    for key, value in values.items():
+        template = template.replace("{{" + key + "}}", str(value))
+    return template
+
+
+def guest(index):
+    """Deterministic synthetic attendee ``index`` as a Luma user record"""
+    first = FIRST_NAMES[index % len(FIRST_NAMES)]
+    last = LAST_NAMES[(index // len(FIRST_NAMES)) % len(LAST_NAMES)]
+    handle = f"{first}{last}{index}".lower()
+    user = {
+        "api_id": f"usr-bench{index:06d}",
+        "name": f"{first} {last} {index}",
+        "username": handle,
+        "bio_short": BIOS[index % len(BIOS)],
+        "twitter_handle": handle,
+        "linkedin_handle": f"/in/{handle}",
+        "website": f"https://{handle}.dev",
+    }
+    # A third of the guests keep their socials off the guest list
+    if index % 3 == 2:
+        user["twitter_handle"] = None
+        user["linkedin_handle"] = None
+    return user
+
+
+class LumaFixtureServer:
+    """Threaded HTTP server for synthetic Luma pages plus a stub n8n webhook.
+
+    ``/bench-<N>`` is an event with N guests whose modal pages through
+    ``/event/get-guest-list`` like the real site, ``/user/<handle>`` are
+    profile pages (rendered HTML plus ``__NEXT_DATA__``), ``/user`` is the
+    session check (401 without a session cookie) and ``POST /webhook``
+    accepts JSON or NDJSON deliveries. ``latency`` adds a fixed delay to every
+    page and API response to approximate a real network.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self.latency = latency
+        self.templates = {name: _load_template(f"{name}.html") for name in ("home", "event", "profile")}
+        self._lock = threading.Lock()
+        self.requests = Counter()
+        self.webhook = {"posts": 0, "contacts": 0, "bytes": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def webhook_url(self):
+        return f"{self.base_url}/webhook"
+
+    def event_url(self, guests):
+        return f"{self.base_url}/bench-{guests}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="luma-fixtures", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests.clear()
+            self.webhook = {"posts": 0, "contacts": 0, "bytes": 0}
+
+    def stats(self):
+        with self._lock:
+            return {"requests": dict(self.requests), "webhook": dict(self.webhook)}
+
+    def _count(self, kind):
+        with self._lock:
+            self.requests[kind] += 1
+
+    def render_event(self, total):
+        preview = ", ".join(guest(i)["name"] for i in range(min(2, total)))
+        return _render(self.templates["event"], TITLE=f"Benchmark Event ({total} guests)",
+                       PREVIEW_NAMES=html.escape(preview), OTHERS=max(0, total - 2),
+                       EVENT_API_ID=f"evt-bench-{total}", PAGE_LIMIT=GUEST_PAGE_LIMIT)
+
+    def guest_page(self, total, cursor, limit):
+        start = int(cursor) if cursor and cursor.isdigit() else 0
+        end = min(total, start + max(1, min(limit, 100)))
+        entries = [{"api_id": f"gst-bench{i:06d}", "user": guest(i)} for i in range(start, end)]
+        return {
+            "entries": entries,
+            "has_more": end < total,
+            "next_cursor": str(end) if end < total else None,
+        }
+
+    def render_profile(self, handle):
+        match = re.search(r"(\d+)$", handle)
+        if not match:
+            return None
+        user = guest(int(match.group(1)))
+        if user["username"] != handle:
+            return None
+        next_data = {"props": {"pageProps": {"initialData": {"user": user}}}}
+        return _render(self.templates["profile"], NAME=html.escape(user["name"]),
+                       TITLE=html.escape(TITLES[int(match.group(1)) % len(TITLES)]),
+                       BIO=html.escape(user["bio_short"]), HANDLE=handle, WEBSITE=user["website"],
+                       NEXT_DATA=json.dumps(next_data).replace("</", "<\\/"))
+
+    def record_delivery(self, body, content_type):
+        if "ndjson" in content_type:
+            lines = [json.loads(line) for line in body.decode("utf-8").splitlines() if line.strip()]
+            contacts = sum(1 for line in lines if "contact" in line)
+        else:
+            message = json.loads(body or b"{}")
+            contacts = len(message.get("contacts") or [])
+        with self._lock:
+            self.webhook["posts"] += 1
+            self.webhook["contacts"] += contacts
+            self.webhook["bytes"] += len(body)
+
+    def _handler_class(self):
+        fixtures = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real site
+
+            def do_GET(self):
+                parts = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                if fixtures.latency:
+                    time.sleep(fixtures.latency)
+
+                if parts.path == "/user":
+                    # Session check: any benchmark session cookie counts as logged in
+                    fixtures._count("session_check")
+                    if "luma.auth-session-key=" not in (self.headers.get("Cookie") or ""):
+                        return self._send(401, {"message": "Not logged in"})
+                    return self._send(200, {"user": {"api_id": "usr-benchrunner", "name": "Benchmark Runner"}})
+                if parts.path == "/":
+                    fixtures._count("home")
+                    return self._send(200, fixtures.templates["home"])
+                match = EVENT_PATH_RE.match(parts.path)
+                if match:
+                    fixtures._count("event")
+                    return self._send(200, fixtures.render_event(int(match.group(1))))
+                if parts.path == "/event/get-guest-list":
+                    match = EVENT_API_ID_RE.match(query.get("event_api_id", ""))
+                    if not match:
+                        return self._send(404, {"message": "Event not found"})
+                    fixtures._count("guest_list_api")
+                    page = fixtures.guest_page(int(match.group(1)), query.get("pagination_cursor"),
+                                               int(query.get("pagination_limit", GUEST_PAGE_LIMIT)))
+                    return self._send(200, page)
+                if parts.path.startswith("/user/"):
+                    page = fixtures.render_profile(parts.path[len("/user/"):])
+                    if page is None:
+                        return self._send(404, "Not found")
+                    fixtures._count("profile")
+                    return self._send(200, page)
+                fixtures._count("other")
+                self._send(404, "Not found")
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if urlparse(self.path).path != "/webhook":
+                    return self._send(404, "Not found")
+                try:
+                    fixtures.record_delivery(body, self.headers.get("Content-Type", ""))
+                except ValueError:
+                    return self._send(400, {"error": "Invalid payload"})
+                self._send(200, {"status": "ok"})
+
+            def _send(self, status, content):
+                if isinstance(content, (dict, list)):
+                    body, content_type = json.dumps(content).encode("utf-8"), "application/json"
+                else:
+                    body, content_type = content.encode("utf-8"), "text/html; charset=utf-8"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    server = LumaFixtureServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765).start()
+    print(f"🧪 Luma fixtures on {server.base_url} (events: {server.event_url(20)}, "
+          f"webhook: {server.webhook_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,56 @@
+# Resident memory of a chromedriver and the Chrome processes it launched (Linux /proc)
+
+from collections import defaultdict
+import os
+
+
+def _children_by_parent():
+    children = defaultdict(list)
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                # Field 4 is the parent pid; the command name may contain spaces
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children[ppid].append(int(name))
+    return children
+
+
+def process_tree(root_pid):
+    """``root_pid`` and all of its descendants"""
+    children = _children_by_parent()
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def _rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def process_tree_rss_mb(root_pid):
+    """Summed RSS of a process tree in MB, or None where /proc is unavailable"""
+    if not root_pid or not os.path.isdir("/proc"):
+        return None
+    return sum(_rss_kb(pid) for pid in process_tree(root_pid)) / 1024
+
+
+def driver_pid(driver):
+    """PID of the chromedriver process behind a Selenium driver (Chrome runs beneath it)"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
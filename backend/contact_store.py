@@ -0,0 +1,223 @@
+# Cross-event store of every scraped person and the events they were seen at
+
+from event_cache import normalize_event_url
+from profile_cache import normalize_profile_url
+from urllib.parse import urlparse
+import json
+import re
+import sqlite3
+import threading
+import time
+
+# Contact fields that describe one scrape rather than the person
+TRANSIENT_FIELDS = ("guest_status", "index", "match_score", "match_terms", "deadline_skipped")
+
+
+def normalize_linkedin_url(linkedin_url):
+    """Canonical LinkedIn profile URL (``https://linkedin.com/in/<slug>``), or None"""
+    if not linkedin_url:
+        return None
+    parts = urlparse(linkedin_url.strip())
+    host = parts.netloc.lower()
+    if not host.endswith("linkedin.com"):
+        return None
+    path = parts.path.rstrip("/").lower()
+    return f"https://linkedin.com{path}" if path else None
+
+
+class ContactStore:
+    """SQLite record of each person once, linked to every event they attended.
+
+    People are keyed by normalized Luma profile URL; the LinkedIn URL is a
+    second identity, so a guest seen without a Luma link (or under a new
+    one) still merges into the same row. Title and bio are indexed for
+    full-text search (FTS5 with Porter stemming, so "founders" finds
+    "Founder"); without FTS5 in the local SQLite build, ``query`` falls
+    back to LIKE matching.
+    """
+
+    def __init__(self, path="contacts.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS people ("
+            " id INTEGER PRIMARY KEY,"
+            " profile_url TEXT UNIQUE,"
+            " linkedin_url TEXT UNIQUE,"
+            " name TEXT NOT NULL,"
+            " title TEXT,"
+            " bio TEXT,"
+            " data TEXT NOT NULL,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS attendance ("
+            " person_id INTEGER NOT NULL REFERENCES people(id),"
+            " event TEXT NOT NULL,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " PRIMARY KEY (person_id, event))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS people_last_seen ON people (last_seen)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS people_name ON people (name COLLATE NOCASE)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS attendance_event ON attendance (event, last_seen)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS attendance_last_seen ON attendance (last_seen)")
+        self.full_text = self._create_fts()
+        self._db.commit()
+
+    def _create_fts(self):
+        try:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS people_fts USING fts5("
+                " title, bio, content='people', content_rowid='id', tokenize='porter unicode61')"
+            )
+        except sqlite3.OperationalError:
+            print("⚠️ SQLite has no FTS5; contact search falls back to LIKE")
+            return False
+        # Keep the external-content index in step with the people table
+        self._db.execute(
+            "CREATE TRIGGER IF NOT EXISTS people_fts_insert AFTER INSERT ON people BEGIN"
+            " INSERT INTO people_fts (rowid, title, bio) VALUES (new.id, new.title, new.bio); END"
+        )
+        self._db.execute(
+            "CREATE TRIGGER IF NOT EXISTS people_fts_update AFTER UPDATE OF title, bio ON people BEGIN"
+            " INSERT INTO people_fts (people_fts, rowid, title, bio) VALUES ('delete', old.id, old.title, old.bio);"
+            " INSERT INTO people_fts (rowid, title, bio) VALUES (new.id, new.title, new.bio); END"
+        )
+        return True
+
+    def record_event(self, event_url, contacts):
+        """Upsert every contact and link it to the event; returns how many people were recorded.
+
+        Contacts with neither a Luma profile nor a LinkedIn URL have no
+        stable identity and are skipped. Fields missing from a new scrape
+        (e.g. a failed profile visit) keep their stored value.
+        """
+        event = normalize_event_url(event_url)
+        now = time.time()
+        recorded = 0
+        with self._lock, self._db:
+            for contact in contacts:
+                person_id = self._upsert(contact, now)
+                if person_id is None:
+                    continue
+                self._db.execute(
+                    "INSERT INTO attendance (person_id, event, first_seen, last_seen) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT (person_id, event) DO UPDATE SET last_seen = excluded.last_seen",
+                    (person_id, event, now, now)
+                )
+                recorded += 1
+        print(f"🗂️ Recorded {recorded} people for {event} in the contact store")
+        return recorded
+
+    def _upsert(self, contact, now):
+        profile_url = normalize_profile_url(contact.get("profile_url"))
+        linkedin_url = normalize_linkedin_url(contact.get("linkedin_url"))
+        if not profile_url and not linkedin_url:
+            return None
+        row = self._find(profile_url, linkedin_url)
+        fields = {k: v for k, v in contact.items() if k not in TRANSIENT_FIELDS}
+        if row is None:
+            return self._db.execute(
+                "INSERT INTO people (profile_url, linkedin_url, name, title, bio, data, first_seen, last_seen)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (profile_url, linkedin_url, contact["name"], contact.get("title"), contact.get("bio"),
+                 json.dumps(fields), now, now)
+            ).lastrowid
+
+        person_id, stored_profile_url, stored_linkedin_url, stored_data = row
+        # Also drops per-run fields stored before they were listed as transient
+        merged = {k: v for k, v in json.loads(stored_data).items() if k not in TRANSIENT_FIELDS}
+        merged.update({k: v for k, v in fields.items() if v not in (None, "", [], False)})
+        if linkedin_url and not stored_linkedin_url and self._owner("linkedin_url", linkedin_url) is None:
+            stored_linkedin_url = linkedin_url
+        if profile_url and not stored_profile_url and self._owner("profile_url", profile_url) is None:
+            stored_profile_url = profile_url
+        self._db.execute(
+            "UPDATE people SET profile_url = ?, linkedin_url = ?, name = ?, title = ?, bio = ?, data = ?,"
+            " last_seen = ? WHERE id = ?",
+            (stored_profile_url, stored_linkedin_url, merged["name"], merged.get("title"), merged.get("bio"),
+             json.dumps(merged), now, person_id)
+        )
+        return person_id
+
+    def _find(self, profile_url, linkedin_url):
+        # Luma profile first: it is the primary identity
+        for column, value in (("profile_url", profile_url), ("linkedin_url", linkedin_url)):
+            if value:
+                row = self._db.execute(
+                    f"SELECT id, profile_url, linkedin_url, data FROM people WHERE {column} = ?", (value,)
+                ).fetchone()
+                if row:
+                    return row
+        return None
+
+    def _owner(self, column, value):
+        row = self._db.execute(f"SELECT id FROM people WHERE {column} = ?", (value,)).fetchone()
+        return row[0] if row else None
+
+    def query(self, text=None, event_url=None, seen_within_days=None, limit=50):
+        """People matching all filters, most recently seen first.
+
+        ``text`` is searched in title and bio (every word must match),
+        ``event_url`` limits to attendees of one event and
+        ``seen_within_days`` to people seen at any event (or at
+        ``event_url``) in that many days.
+        """
+        where, args = [], []
+        join = ""
+        if text:
+            words = re.findall(r"\w+", text.lower())
+            if self.full_text and words:
+                where.append("p.id IN (SELECT rowid FROM people_fts WHERE people_fts MATCH ?)")
+                args.append(" ".join(f'"{word}"' for word in words))  # Quoted: no FTS query syntax
+            elif words:
+                for word in words:
+                    where.append("(p.title LIKE ? OR p.bio LIKE ?)")
+                    args += [f"%{word}%"] * 2
+        if event_url or seen_within_days:
+            join = " JOIN attendance a ON a.person_id = p.id"
+        if event_url:
+            where.append("a.event = ?")
+            args.append(normalize_event_url(event_url))
+        if seen_within_days:
+            where.append("a.last_seen >= ?")
+            args.append(time.time() - float(seen_within_days) * 86400)
+        sql = ("SELECT DISTINCT p.id, p.data, p.first_seen, p.last_seen FROM people p" + join +
+               (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY p.last_seen DESC LIMIT ?")
+        with self._lock:
+            rows = self._db.execute(sql, (*args, limit)).fetchall()
+            return [self._person(*row) for row in rows]
+
+    def get(self, profile_url=None, linkedin_url=None):
+        """One person by Luma profile URL or LinkedIn URL, or None"""
+        with self._lock:
+            row = self._find(normalize_profile_url(profile_url), normalize_linkedin_url(linkedin_url))
+            if not row:
+                return None
+            person = self._db.execute(
+                "SELECT id, data, first_seen, last_seen FROM people WHERE id = ?", (row[0],)
+            ).fetchone()
+            return self._person(*person)
+
+    def stats(self):
+        with self._lock:
+            people = self._db.execute("SELECT COUNT(*) FROM people").fetchone()[0]
+            events, links = self._db.execute("SELECT COUNT(DISTINCT event), COUNT(*) FROM attendance").fetchone()
+        return {"people": people, "events": events, "attendances": links, "full_text": self.full_text}
+
+    def _person(self, person_id, data, first_seen, last_seen):
+        def fmt(ts):
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+        events = self._db.execute(
+            "SELECT event, last_seen FROM attendance WHERE person_id = ? ORDER BY last_seen DESC", (person_id,)
+        ).fetchall()
+        return {
+            **json.loads(data),
+            "first_seen": fmt(first_seen),
+            "last_seen": fmt(last_seen),
+            "events": [{"event_url": event, "seen_at": fmt(seen)} for event, seen in events],
+        }
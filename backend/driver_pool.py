@@ -0,0 +1,318 @@
+# Warm pool of authenticated Chrome drivers shared by scrape jobs
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from contextlib import contextmanager
+from metrics import BROWSER_LAUNCH_SECONDS, COOKIE_LOGIN_SECONDS, DRIVER_RECYCLES
+from chrome_memory import driver_pid, process_tree_rss_mb
+from luma_session import LumaSession, COOKIES_FILE
+from resource_blocking import apply_to_options, enable_blocking
+from guest_capture import flush_network_log
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+
+
+def build_chrome_options(profile_dir, headless=True, capture_network=False):
+    """Chrome options used by every scraper driver"""
+    options = Options()
+    if capture_network:
+        # Exposes Network.* events via driver.get_log("performance")
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    if headless:
+        options.add_argument("--headless")  # Run in headless mode for deployment
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+    options.add_argument(f"--user-data-dir={profile_dir}")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    apply_to_options(options)  # No images; see RESOURCE_BLOCKING
+    return options
+
+
+def create_driver(profile_dir, headless=True, capture_network=False):
+    """Launch a Chrome instance bound to its own profile directory"""
+    driver = webdriver.Chrome(options=build_chrome_options(profile_dir, headless, capture_network))
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    enable_blocking(driver)  # Fonts, media and trackers
+    return driver
+
+
+def is_driver_healthy(driver):
+    """Cheap liveness probe: a dead browser or session raises on any command"""
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+class DriverPool:
+    """Fixed-size pool of logged-in Chrome drivers.
+
+    Drivers are launched and authenticated once, checked out per job and
+    returned afterwards. Unhealthy drivers, and drivers that have served
+    ``max_uses`` jobs, are quit and replaced with a fresh one. Drivers
+    holding cookies older than ``session.version`` get the current ones
+    when checked out.
+
+    Memory governor: ``recycle_if_needed`` is called between profiles and
+    swaps a driver for a fresh, logged-in one once it has made
+    ``max_navigations`` page loads or its Chrome process tree exceeds
+    ``max_rss_mb`` (checked every ``memory_check_every`` navigations). The
+    caller keeps going with the returned driver; ``release`` also accepts
+    the original handle.
+    """
+
+    def __init__(self, size=2, headless=True, max_uses=50, cookies_file=COOKIES_FILE, capture_network=False,
+                 session=None, max_navigations=200, max_rss_mb=1024, memory_check_every=5):
+        self.size = size
+        self.headless = headless
+        self.capture_network = capture_network
+        self.max_uses = max_uses
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+        self.memory_check_every = max(1, memory_check_every)
+        self.cookies_file = cookies_file
+        self.session = session or LumaSession(cookies_file)
+        self._idle = queue.Queue()
+        self._meta = {}  # id(driver) -> {"profile_dir", "pid", "uses", "navigations", "rss_mb", ...}
+        self._replaced = {}  # driver recycled mid-job -> its replacement
+        self._lock = threading.Lock()
+        self._total = 0
+        self._recycled = 0
+
+    def start(self):
+        """Launch and log in drivers until the pool is full"""
+        print(f"🌐 Warming driver pool ({self.size} drivers)...")
+        while True:
+            with self._lock:
+                if self._total >= self.size:
+                    break
+                self._total += 1
+            try:
+                self._idle.put(self._spawn())
+            except Exception as e:
+                with self._lock:
+                    self._total -= 1
+                print(f"❌ Could not start pooled driver: {e}")
+                break
+        print(f"✅ Driver pool ready: {self._idle.qsize()} idle")
+
+    def acquire(self, timeout=None):
+        """Check out a healthy driver, launching one if the pool is not full"""
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = None
+                with self._lock:
+                    can_spawn = self._total < self.size
+                    if can_spawn:
+                        self._total += 1
+                if can_spawn:
+                    try:
+                        return self._spawn()
+                    except Exception:
+                        with self._lock:
+                            self._total -= 1
+                        raise
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No Chrome driver available in pool")
+                try:
+                    driver = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError("No Chrome driver available in pool")
+
+            if is_driver_healthy(driver):
+                self._refresh_cookies(driver)
+                return driver
+            print("⚠️ Pooled driver failed health check, recycling")
+            self._discard(driver)
+
+    def try_acquire(self):
+        """Check out a driver only if one is free right now, else return None"""
+        try:
+            return self.acquire(timeout=0)
+        except Exception:
+            return None
+
+    def release(self, driver, healthy=True):
+        """Return a driver to the pool, recycling it if worn out, over its memory limit or broken"""
+        driver = self.current(driver)
+        meta = self._meta.get(id(driver))
+        reason = None
+        if meta is not None:
+            meta["uses"] += 1
+            if meta["uses"] >= self.max_uses:
+                reason = "worn out"
+            else:
+                reason = self._over_limit(meta, check_memory=True)
+        if not reason and not (healthy and is_driver_healthy(driver)):
+            reason = "unhealthy"
+        if not reason:
+            if self.capture_network:
+                flush_network_log(driver)  # Profile visits keep logging; the next job starts empty
+            self._idle.put(driver)
+            return
+
+        print(f"♻️ Recycling driver ({reason})")
+        DRIVER_RECYCLES.inc(reason=reason.split()[0])
+        self._discard(driver)
+        with self._lock:
+            if self._total >= self.size:
+                return
+            self._total += 1
+        try:
+            self._idle.put(self._spawn())
+        except Exception as e:
+            with self._lock:
+                self._total -= 1
+            print(f"❌ Could not replace recycled driver: {e}")
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Context manager that checks a driver out for the duration of a job"""
+        driver = self.acquire(timeout)
+        healthy = True
+        try:
+            yield driver
+        except Exception:
+            healthy = is_driver_healthy(self.current(driver))
+            raise
+        finally:
+            self.release(driver, healthy)
+
+    def recycle_if_needed(self, driver, navigations=1):
+        """Between profiles: count page loads and swap the driver once it is past its limits.
+
+        Returns the driver to continue with (the same one, or a fresh
+        logged-in replacement). Unknown drivers are returned unchanged.
+        """
+        meta = self._meta.get(id(driver))
+        if meta is None:
+            return driver
+        meta["navigations"] += navigations
+        check_memory = meta["navigations"] % self.memory_check_every == 0
+        reason = self._over_limit(meta, check_memory)
+        if not reason:
+            return driver
+
+        print(f"♻️ Recycling driver mid-job ({reason})")
+        with self._lock:
+            self._total += 1
+        try:
+            replacement = self._spawn()
+        except Exception as e:
+            with self._lock:
+                self._total -= 1
+            print(f"❌ Could not replace driver, continuing with the old one: {e}")
+            return driver
+        DRIVER_RECYCLES.inc(reason=reason.split()[0])
+        with self._lock:
+            self._replaced[driver] = replacement
+        self._discard(driver)
+        return replacement
+
+    def current(self, driver):
+        """The live driver behind a handle that may have been recycled mid-job"""
+        with self._lock:
+            while driver in self._replaced:
+                driver = self._replaced.pop(driver)
+        return driver
+
+    def shutdown(self):
+        """Quit all idle drivers"""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "live": self._total,
+                "idle": self._idle.qsize(),
+                "recycled": self._recycled,
+            }
+
+    def memory_stats(self):
+        """Current Chrome RSS and navigation count of every live driver"""
+        with self._idle.mutex:
+            idle = {id(driver) for driver in self._idle.queue}
+        drivers = []
+        for key, meta in list(self._meta.items()):
+            meta["rss_mb"] = process_tree_rss_mb(meta["pid"])
+            drivers.append({
+                "state": "idle" if key in idle else "busy",
+                "rss_mb": round(meta["rss_mb"], 1) if meta["rss_mb"] is not None else None,
+                "navigations": meta["navigations"],
+                "uses": meta["uses"],
+                "age_seconds": int(time.time() - meta["created_at"]),
+            })
+        known = [d["rss_mb"] for d in drivers if d["rss_mb"] is not None]
+        return {
+            "total_rss_mb": round(sum(known), 1) if known else None,
+            "max_rss_mb": self.max_rss_mb,
+            "max_navigations": self.max_navigations,
+            "drivers": drivers,
+        }
+
+    def _spawn(self):
+        profile_dir = tempfile.mkdtemp(prefix="luma-chrome-")
+        with BROWSER_LAUNCH_SECONDS.time():
+            driver = create_driver(profile_dir, self.headless, self.capture_network)
+        try:
+            with COOKIE_LOGIN_SECONDS.time():
+                session_version = self.session.apply_to_driver(driver)
+        except Exception:
+            driver.quit()
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        self._meta[id(driver)] = {
+            "profile_dir": profile_dir,
+            "uses": 0,
+            "created_at": time.time(),
+            "session_version": session_version,
+            "pid": driver_pid(driver),
+            "navigations": 0,
+            "rss_mb": None,
+        }
+        return driver
+
+    def _over_limit(self, meta, check_memory):
+        if self.max_navigations and meta["navigations"] >= self.max_navigations:
+            return f"navigations {meta['navigations']}"
+        if check_memory and self.max_rss_mb:
+            meta["rss_mb"] = process_tree_rss_mb(meta["pid"])
+            if meta["rss_mb"] is not None and meta["rss_mb"] > self.max_rss_mb:
+                return f"memory {meta['rss_mb']:.0f} MB"
+        return None
+
+    def _refresh_cookies(self, driver):
+        meta = self._meta.get(id(driver))
+        if meta is None or meta["session_version"] >= self.session.version:
+            return
+        with COOKIE_LOGIN_SECONDS.time():
+            meta["session_version"] = self.session.apply_to_driver(driver)
+
+    def _discard(self, driver):
+        meta = self._meta.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        if meta:
+            shutil.rmtree(meta["profile_dir"], ignore_errors=True)
+        with self._lock:
+            self._total -= 1
+            self._recycled += 1
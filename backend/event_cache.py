@@ -0,0 +1,95 @@
+# Single-flight coalescing and short-TTL result cache for event scrapes
+
+from urllib.parse import urlparse
+import copy
+import threading
+import time
+
+
+def normalize_event_url(event_url):
+    """Cache key for an event: host alias and query string (e.g. ?tk=) dropped"""
+    parts = urlparse(event_url.strip())
+    host = parts.netloc.lower()
+    if host in ("www.lu.ma", "luma.com", "www.luma.com"):
+        host = "lu.ma"
+    return f"{host}{parts.path.rstrip('/')}"
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.contacts = None
+        self.error = None
+
+
+class EventScrapeCache:
+    """Shares one scrape between concurrent requests for the same event.
+
+    The first caller for an event runs the scrape; callers arriving while it
+    is in flight wait for and reuse its result. Finished results are kept
+    for ``ttl`` seconds so later requests skip Chrome entirely.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._flights = {}  # key -> _Flight
+        self._results = {}  # key -> (finished_at, contacts)
+        self._stats = {"scrapes": 0, "cache_hits": 0, "coalesced": 0}
+
+    def get_or_scrape(self, event_url, scrape, force_refresh=False):
+        """Return (contacts, source) where source is "scrape", "cache" or "shared".
+
+        ``force_refresh`` skips the result cache but still joins an in-flight
+        scrape of the same event.
+        """
+        key = normalize_event_url(event_url)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached and not force_refresh and time.time() - cached[0] < self.ttl:
+                self._stats["cache_hits"] += 1
+                return copy.deepcopy(cached[1]), "cache"
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._stats["scrapes"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            print(f"🔗 Joining in-flight scrape of {key}")
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return copy.deepcopy(flight.contacts), "shared"
+
+        try:
+            flight.contacts = scrape()
+            with self._lock:
+                self._results[key] = (time.time(), flight.contacts)
+                self._prune()
+            return copy.deepcopy(flight.contacts), "scrape"
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                "in_flight": len(self._flights),
+                "cached_events": len(self._results),
+                "ttl_seconds": self.ttl,
+            }
+
+    def _prune(self):
+        now = time.time()
+        for key in [k for k, (finished_at, _) in self._results.items() if now - finished_at >= self.ttl]:
+            del self._results[key]
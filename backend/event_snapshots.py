@@ -0,0 +1,199 @@
+# Guest-list snapshots per event so re-scrapes only deep-scrape new or changed attendees
+
+from event_cache import normalize_event_url
+from profile_cache import normalize_profile_url
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def guest_key(basic_contact):
+    """Stable identity of a guest: normalized profile URL, else the display name"""
+    return normalize_profile_url(basic_contact.get("profile_url")) or f"name:{basic_contact['name']}"
+
+
+def guest_hash(basic_contact):
+    """Content hash of what the guest list shows for a guest (name, profile URL, modal socials, short bio)"""
+    content = json.dumps({
+        "name": basic_contact["name"],
+        "profile_url": normalize_profile_url(basic_contact.get("profile_url")),
+        "modal_socials": basic_contact.get("modal_socials") or {},
+        "bio_short": basic_contact.get("bio_short"),
+    }, sort_keys=True)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class EventSnapshotStore:
+    """Last seen guest list of each event, with the profile data scraped for every guest.
+
+    One row per (event, guest) holding the guest's content hash, profile
+    dict and when that profile was scraped, plus one row per event with the diff of its latest scrape, so the
+    API can report it for cached and shared results as well.
+    """
+
+    def __init__(self, path="event_snapshots.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " event TEXT PRIMARY KEY,"
+            " guests INTEGER NOT NULL,"
+            " diff TEXT NOT NULL,"
+            " scraped_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot_guests ("
+            " event TEXT NOT NULL,"
+            " guest TEXT NOT NULL,"
+            " hash TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " profile_url TEXT,"
+            " profile TEXT NOT NULL,"
+            " scraped_at REAL NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (event, guest))"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(snapshot_guests)")]
+        if "scraped_at" not in columns:
+            # Snapshots from before profile ages were tracked count as stale
+            self._db.execute("ALTER TABLE snapshot_guests ADD COLUMN scraped_at REAL NOT NULL DEFAULT 0")
+        self._db.commit()
+
+    def load(self, event_url):
+        """guest key -> {"hash", "name", "profile_url", "profile", "scraped_at"} from the last scrape, or None"""
+        key = normalize_event_url(event_url)
+        with self._lock:
+            if not self._db.execute("SELECT 1 FROM snapshots WHERE event = ?", (key,)).fetchone():
+                return None
+            rows = self._db.execute(
+                "SELECT guest, hash, name, profile_url, profile, scraped_at FROM snapshot_guests WHERE event = ?",
+                (key,)
+            ).fetchall()
+        return {
+            guest: {"hash": digest, "name": name, "profile_url": profile_url, "profile": json.loads(profile),
+                    "scraped_at": scraped_at}
+            for guest, digest, name, profile_url, profile, scraped_at in rows
+        }
+
+    def save(self, event_url, guests, diff, keep=()):
+        """Replace an event's snapshot with ``guests`` (guest key -> entry), keeping the ``keep`` keys"""
+        key = normalize_event_url(event_url)
+        rows = [(key, guest, entry["hash"], entry["name"], entry["profile_url"], json.dumps(entry["profile"]),
+                 entry["scraped_at"]) for guest, entry in guests.items()]
+        with self._lock, self._db:
+            keep = list(keep)
+            placeholders = ",".join("?" * len(keep))
+            self._db.execute(
+                f"DELETE FROM snapshot_guests WHERE event = ? AND guest NOT IN ({placeholders})", (key, *keep)
+            )
+            self._db.executemany("INSERT OR REPLACE INTO snapshot_guests VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            total = self._db.execute("SELECT COUNT(*) FROM snapshot_guests WHERE event = ?", (key,)).fetchone()[0]
+            self._db.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                             (key, total, json.dumps(diff), time.time()))
+
+    def last_diff(self, event_url):
+        """Diff recorded by the latest scrape of an event, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT diff FROM snapshots WHERE event = ?", (normalize_event_url(event_url),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def stats(self):
+        with self._lock:
+            events, guests = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(guests), 0) FROM snapshots"
+            ).fetchone()
+        return {"events": events, "guests": guests}
+
+
+class GuestListDiff:
+    """Compares a streamed guest list with the event's previous snapshot.
+
+    ``classify`` is called as each guest arrives and returns its status
+    (``"new"``, ``"changed"`` or ``"unchanged"``) plus, for unchanged guests
+    whose profile was scraped last time, that profile data so the caller can
+    skip the visit. Stored profiles older than ``max_age`` seconds (the
+    profile cache TTL) are not reused, so both caches expire together.
+    ``commit`` stores the new snapshot and returns the diff.
+    Removals are only reported when the guest list was read to the end:
+    guests past a ``max_users`` cut-off stay in the snapshot untouched, and
+    so do guests whose visit was skipped at a deadline.
+    """
+
+    def __init__(self, store, event_url, reuse_profiles=True, max_age=None):
+        self.store = store
+        self.event_url = event_url
+        self.reuse_profiles = reuse_profiles
+        self.max_age = max_age
+        self.previous = store.load(event_url)
+        self.seen = {}  # guest key -> (index, hash)
+        self.scraped_at = {}  # guest key -> when a profile not scraped in this run was scraped
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0, "reused": 0}
+        self._lock = threading.Lock()
+
+    def classify(self, index, basic_contact):
+        key, digest = guest_key(basic_contact), guest_hash(basic_contact)
+        before = (self.previous or {}).get(key)
+        if before is None:
+            status = "new"
+        elif before["hash"] != digest:
+            status = "changed"
+        else:
+            status = "unchanged"
+        reused = before["profile"] if status == "unchanged" and self.reuse_profiles and before["profile"] else None
+        if reused and self.max_age is not None and time.time() - before["scraped_at"] >= self.max_age:
+            reused = None  # Stale: the profile cache or a fresh visit decides
+        with self._lock:
+            self.seen[key] = (index, digest)
+            self.counts[status] += 1
+            if reused:
+                self.counts["reused"] += 1
+                self.scraped_at[key] = before["scraped_at"]
+        return status, (dict(reused) if reused else None)
+
+    def note_cached(self, basic_contact, scraped_at):
+        """Record that a guest's profile came from the profile cache, scraped at ``scraped_at``"""
+        with self._lock:
+            self.scraped_at[guest_key(basic_contact)] = scraped_at
+
+    def commit(self, basic_contacts, profile_results, truncated=False):
+        """Persist the snapshot and return the diff summary"""
+        previous = self.previous or {}
+        unseen = [key for key in previous if key not in self.seen]
+        removed = [] if truncated else [
+            {"name": previous[key]["name"], "profile_url": previous[key]["profile_url"]} for key in unseen
+        ]
+        keep = list(unseen) if truncated else []
+        now = time.time()
+        guests = {}
+        for key, (index, digest) in self.seen.items():
+            basic_contact = basic_contacts[index]
+            if basic_contact.get("deadline_skipped"):
+                # Never visited: the next scrape must still see this guest as new or changed
+                if key in previous:
+                    keep.append(key)
+                continue
+            profile = profile_results[index] if index < len(profile_results) else {}
+            scraped_at = self.scraped_at.get(key, now)
+            if not profile and key in previous and previous[key]["hash"] == digest:
+                # Keep the last good scrape over a failed visit
+                profile, scraped_at = previous[key]["profile"], previous[key]["scraped_at"]
+            guests[key] = {"hash": digest, "name": basic_contact["name"],
+                           "profile_url": basic_contact.get("profile_url"), "profile": profile or {},
+                           "scraped_at": scraped_at}
+        diff = {
+            "first_scrape": self.previous is None,
+            "new": self.counts["new"],
+            "changed": self.counts["changed"],
+            "unchanged": self.counts["unchanged"],
+            "profiles_reused": self.counts["reused"],
+            "removed": removed,
+            "compared_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.store.save(self.event_url, guests, diff, keep=keep)
+        print(f"🧮 Guest list diff: {diff['new']} new, {diff['changed']} changed, "
+              f"{diff['unchanged']} unchanged ({diff['profiles_reused']} profiles reused), {len(removed)} removed")
+        return diff
@@ -0,0 +1,162 @@
+# Guest list capture from Luma's own network responses (Chrome performance log + CDP)
+
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+from http_profile import links_from_user_json
+from luma_session import LUMA_BASE_URL
+import json
+import time
+
+GUEST_LIST_API_FRAGMENT = "/event/get-guest-list"
+PAGE_LIMIT = 100
+PAGE_ATTEMPTS = 3  # Tries per page when Luma throttles the guest-list API
+
+# Runs inside the page so the request carries the logged-in session cookies
+FETCH_JSON_JS = """
+const done = arguments[arguments.length - 1];
+fetch(arguments[0], {credentials: 'include', headers: {'Accept': 'application/json'}})
+  .then(r => r.ok ? r.json() : r.text().then(body => ({
+    __error: 'HTTP ' + r.status, __status: r.status, __body: body.slice(0, 20000),
+    __retry_after: r.headers.get('Retry-After')})))
+  .then(done)
+  .catch(e => done({__error: String(e)}));
+"""
+
+
+def flush_network_log(driver):
+    """Discard buffered performance-log entries (e.g. from previous pages)"""
+    try:
+        driver.get_log("performance")
+    except Exception:
+        pass
+
+
+def wait_for_guest_list_response(driver, timeout=10):
+    """Poll the performance log for the guest-list response the modal triggers.
+
+    Returns (request_url, parsed_json) or None if nothing was captured.
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        for entry in driver.get_log("performance"):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            if message.get("method") != "Network.responseReceived":
+                continue
+            params = message.get("params", {})
+            url = params.get("response", {}).get("url", "")
+            if GUEST_LIST_API_FRAGMENT not in url:
+                continue
+            body = _response_body(driver, params.get("requestId"))
+            if body is not None:
+                return url, body
+        time.sleep(0.2)
+    return None
+
+
+def _response_body(driver, request_id, attempts=10):
+    # The body may not be available until loadingFinished fires
+    for _ in range(attempts):
+        try:
+            result = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            return json.loads(result.get("body", ""))
+        except ValueError:
+            return None
+        except Exception:
+            time.sleep(0.2)
+    return None
+
+
+def _page_url(url, cursor):
+    parts = urlparse(url)
+    query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+    query["pagination_cursor"] = cursor
+    query["pagination_limit"] = str(PAGE_LIMIT)
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+
+def _entry_user(entry):
+    # Guest entries either wrap the person under "user"/"guest" or are the person
+    for key in ("user", "guest"):
+        if isinstance(entry.get(key), dict):
+            return entry[key]
+    return entry
+
+
+def guest_to_basic_contact(entry, extract_socials):
+    """Map one guest-list JSON entry to the modal ``basic_contacts`` shape"""
+    user = _entry_user(entry)
+    slug = user.get("username") or user.get("api_id")
+    return {
+        "name": (user.get("name") or "Unknown").strip(),
+        "profile_url": f"{LUMA_BASE_URL}/user/{slug}" if slug else None,
+        "modal_socials": extract_socials(links_from_user_json(user)),
+        "bio_short": user.get("bio_short"),  # Only used to prioritize profile visits
+    }
+
+
+def capture_guest_list(driver, extract_socials, max_users, timeout=10, rate_limiter=None):
+    """Stream ``basic_contacts`` entries from the guest-list API responses.
+
+    Must be called right after the guest modal trigger is clicked, with a
+    driver launched with performance logging enabled. Returns None when no
+    guest-list response was observed, so callers can fall back to DOM
+    scraping; otherwise returns a generator that follows the pagination
+    cursor directly (no scrolling) until ``max_users`` guests are yielded
+    or the list is exhausted. Page fetches go through ``rate_limiter``.
+    The driver's performance log is drained when the stream ends.
+    """
+    captured = wait_for_guest_list_response(driver, timeout)
+    if not captured:
+        print("⚠️ No guest-list network response captured")
+        return None
+    return _iter_guest_pages(driver, extract_socials, max_users, *captured, rate_limiter=rate_limiter)
+
+
+def _fetch_page(driver, url, rate_limiter=None):
+    """Fetch one guest-list page in the page context, paced and backed off by ``rate_limiter``"""
+    for attempt in range(PAGE_ATTEMPTS):
+        if rate_limiter:
+            rate_limiter.acquire(url)
+        page = driver.execute_async_script(FETCH_JSON_JS, url)
+        if not rate_limiter or not isinstance(page, dict) or (page.get("__error") and "__status" not in page):
+            return page  # Network errors are not throttling signals
+        if rate_limiter.report_status(url, page.get("__status", 200), page.get("__body"), page.get("__retry_after")):
+            return page  # Success, or an HTTP error that is not throttling
+    return page  # Still throttled after every attempt
+
+
+def _iter_guest_pages(driver, extract_socials, max_users, request_url, page, rate_limiter=None):
+    driver.set_script_timeout(30)
+    try:
+        yield from _guest_pages(driver, extract_socials, max_users, request_url, page, rate_limiter)
+    finally:
+        flush_network_log(driver)  # Later profile visits on this driver would otherwise pile up unread
+
+
+def _guest_pages(driver, extract_socials, max_users, request_url, page, rate_limiter):
+    seen = set()
+    pages = 1
+    while True:
+        for entry in page.get("entries", []):
+            contact = guest_to_basic_contact(entry, extract_socials)
+            key = contact["profile_url"] or contact["name"]
+            if key in seen:
+                continue
+            seen.add(key)
+            yield contact
+            if len(seen) >= max_users:
+                print(f"🚫 Reached max users limit ({max_users})")
+                return
+
+        cursor = page.get("next_cursor")
+        if not page.get("has_more") or not cursor:
+            break
+        page = _fetch_page(driver, _page_url(request_url, cursor), rate_limiter)
+        pages += 1
+        if not isinstance(page, dict) or page.get("__error"):
+            print(f"⚠️ Guest-list page {pages} failed: {page.get('__error') if isinstance(page, dict) else page}")
+            break
+
+    print(f"👥 Captured {len(seen)} guests from {pages} guest-list responses")
@@ -0,0 +1,85 @@
+# Incremental guest-modal harvesting: scroll until the list stops growing
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from luma_session import LUMA_BASE_URL
+import time
+
+# Same rows as the XPath //div[contains(@class, 'gap-2 spread')], read in one round trip
+GUEST_ROWS_JS = """
+return Array.from(document.querySelectorAll("div[class*='gap-2 spread']")).map(row => {
+  const nameEl = row.querySelector('.name');
+  const profile = row.querySelector("a[href*='/user/']");
+  return {
+    name: nameEl ? nameEl.innerText.trim() : 'Unknown',
+    profile_url: profile ? profile.href : null,
+    hrefs: Array.from(row.querySelectorAll('a')).map(a => a.href).filter(Boolean)
+  };
+});
+"""
+
+
+def extract_guest_rows(driver):
+    """All rendered guest rows as ``{name, profile_url, hrefs}`` dicts via one execute_script"""
+    return driver.execute_script(GUEST_ROWS_JS) or []
+
+
+def row_to_basic_contact(row, extract_socials):
+    profile_url = row.get("profile_url")
+    if profile_url and profile_url.startswith("/user/"):
+        profile_url = LUMA_BASE_URL + profile_url
+    return {
+        "name": row.get("name") or "Unknown",
+        "profile_url": profile_url,
+        "modal_socials": extract_socials(list(set(row.get("hrefs") or [])))
+    }
+
+
+def iter_modal_guests(driver, extract_socials, max_users, scroll_wait=2.0, stable_rounds=2):
+    """Yield guests from the open guest modal as they are rendered.
+
+    Rows are read as soon as they appear (so rows a virtualized list later
+    unmounts are not missed) and deduplicated by profile URL. After each
+    scroll the rows are polled for up to ``scroll_wait`` seconds; scrolling
+    stops once ``stable_rounds`` consecutive scrolls produce no new rows,
+    or after ``max_users`` unique guests.
+    """
+    modal = WebDriverWait(driver, 10).until(
+        EC.presence_of_element_located((By.CLASS_NAME, "lux-modal-body"))
+    )
+
+    print("📜 Loading guests until the list stops growing...")
+    seen = set()  # profile URL (or name) of yielded guests
+    idle_rounds = 0
+    scrolls = 0
+    deadline = time.time() + scroll_wait
+    while True:
+        new_rows = 0
+        for row in extract_guest_rows(driver):
+            contact = row_to_basic_contact(row, extract_socials)
+            key = contact["profile_url"] or contact["name"]
+            if key in seen:
+                continue
+            seen.add(key)
+            new_rows += 1
+            yield contact
+            if len(seen) >= max_users:
+                print(f"🚫 Reached max users limit ({max_users})")
+                return
+
+        if new_rows:
+            idle_rounds = 0
+        elif time.time() < deadline:
+            time.sleep(0.25)  # Keep polling for rows triggered by the last scroll
+            continue
+        else:
+            idle_rounds += 1
+            if idle_rounds >= stable_rounds:
+                break
+
+        driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", modal)
+        scrolls += 1
+        deadline = time.time() + scroll_wait
+
+    print(f"👥 Found {len(seen)} guests in modal after {scrolls} scrolls")
@@ -0,0 +1,212 @@
+# Browserless profile fetcher: plain HTTP GET + HTML/JSON parsing of Luma user pages
+
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+from luma_session import LumaSession, is_logged_out_url
+from rate_limiter import HostRateLimiter
+import json
+import re
+import threading
+import requests
+
+USER_AGENT = ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+# Class-name fragments mirroring the CSS/XPath selectors used by scrape_user_profile
+BIO_CLASSES = ["bio", "description", "about", "user-bio"]
+TITLE_CLASSES = ["title", "job-title", "position", "headline", "user-title", "job"]
+
+# Luma user JSON fields -> URL templates
+HANDLE_URLS = {
+    "linkedin_handle": "https://www.linkedin.com{}",
+    "twitter_handle": "https://x.com/{}",
+    "instagram_handle": "https://instagram.com/{}",
+    "youtube_handle": "https://youtube.com/@{}",
+    "tiktok_handle": "https://tiktok.com/@{}",
+}
+
+NEXT_DATA_RE = re.compile(r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+TEXT_URL_RE = re.compile(r'https?://[^\s<>"]+')
+
+
+class _ProfileHTMLParser(HTMLParser):
+    """Collects anchor hrefs, visible text and the first bio/title-like element text"""
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+        self.hrefs = []
+        self.text_chunks = []
+        self.bio = None
+        self.title = None
+        self._stack = []  # [tag, kind, text parts] for open elements
+        self._skip = 0  # depth inside <script>/<style>
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ("script", "style"):
+            self._skip += 1
+            return
+        if tag == "a" and attrs.get("href"):
+            self.hrefs.append(urljoin(self.base_url, attrs["href"]))
+        classes = (attrs.get("class") or "").split()
+        kind = None
+        if attrs.get("data-testid") == "bio" or any(c in BIO_CLASSES for c in classes) or \
+                (tag == "div" and any("bio" in c or "description" in c for c in classes)):
+            kind = "bio"
+        elif any(c in TITLE_CLASSES for c in classes) or \
+                (tag == "div" and any("title" in c or "job" in c for c in classes)):
+            kind = "title"
+        if tag not in ("br", "img", "input", "meta", "link", "hr"):
+            self._stack.append([tag, kind, []])
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self._skip = max(0, self._skip - 1)
+            return
+        # Pop up to and including the matching tag (tolerates unclosed children)
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag:
+                for _, kind, parts in reversed(self._stack[i:]):
+                    text = " ".join(" ".join(parts).split())
+                    if kind == "bio" and text and not self.bio:
+                        self.bio = text
+                    elif kind == "title" and text and not self.title:
+                        self.title = text
+                del self._stack[i:]
+                break
+
+    def handle_data(self, data):
+        if self._skip or not data.strip():
+            return
+        self.text_chunks.append(data)
+        for _, kind, parts in self._stack:
+            if kind:
+                parts.append(data)
+
+
+def _find_user_object(node):
+    """Depth-first search of page JSON for the Luma user record"""
+    if isinstance(node, dict):
+        api_id = node.get("api_id")
+        if isinstance(api_id, str) and api_id.startswith("usr-") and "name" in node:
+            return node
+        for value in node.values():
+            found = _find_user_object(value)
+            if found:
+                return found
+    elif isinstance(node, list):
+        for value in node:
+            found = _find_user_object(value)
+            if found:
+                return found
+    return None
+
+
+def links_from_user_json(user):
+    """Absolute social/website URLs from a Luma user record's handle fields"""
+    links = []
+    for field, template in HANDLE_URLS.items():
+        handle = user.get(field)
+        if handle:
+            links.append(template.format(handle))
+    website = user.get("website")
+    if website:
+        links.append(website if website.startswith("http") else "https://" + website)
+    return links
+
+
+class HttpProfileFetcher:
+    """Fetches Luma profile pages over a pooled, cookie-authenticated requests.Session.
+
+    ``fetch`` returns the same dict shape as ``scrape_user_profile`` or None
+    when the page could not be fetched or parsed, so callers can fall back to
+    Selenium for that profile.
+    """
+
+    def __init__(self, extract_socials, luma_session=None, pool_size=10, timeout=15, rate_limiter=None):
+        self.extract_socials = extract_socials
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml",
+        })
+        self.luma_session = luma_session or LumaSession()
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self._cookie_lock = threading.Lock()
+        self._session_version = self.luma_session.apply_to_requests(self.session)
+
+    def fetch(self, profile_url):
+        if not profile_url:
+            return {}
+        self._refresh_cookies()
+        self.rate_limiter.acquire(profile_url)
+        try:
+            res = self.session.get(profile_url, timeout=self.timeout)
+            if not self.rate_limiter.report_response(res):
+                print(f"   🐢 Throttled fetching {profile_url} (HTTP {res.status_code})")
+                return None
+            if res.status_code in (401, 403) or is_logged_out_url(res.url):
+                print(f"   🔒 Logged out while fetching {profile_url}")
+                self.luma_session.report_logged_out()
+                return None
+            if res.status_code != 200:
+                print(f"   ⚠️ HTTP profile fetch {res.status_code}: {profile_url}")
+                return None
+            return self.parse(res.text, profile_url)
+        except requests.exceptions.Timeout as e:
+            self.rate_limiter.report_throttled(profile_url, "timeout")
+            print(f"   ⚠️ HTTP profile fetch timed out for {profile_url}: {e}")
+            return None
+        except Exception as e:
+            print(f"   ⚠️ HTTP profile fetch failed for {profile_url}: {e}")
+            return None
+
+    def _refresh_cookies(self):
+        if self._session_version == self.luma_session.version:
+            return
+        with self._cookie_lock:
+            if self._session_version != self.luma_session.version:
+                self.session.cookies.clear()
+                self._session_version = self.luma_session.apply_to_requests(self.session)
+
+    def parse(self, html, profile_url):
+        parser = _ProfileHTMLParser(profile_url)
+        parser.feed(html)
+        parser.close()
+
+        user = None
+        match = NEXT_DATA_RE.search(html)
+        if match:
+            try:
+                user = _find_user_object(json.loads(match.group(1)))
+            except ValueError:
+                user = None
+
+        # Without the embedded user record or any rendered content the page is
+        # most likely a client-side shell; let Selenium handle it
+        if not user and not parser.bio and not parser.title:
+            return None
+
+        profile_data = {}
+        bio = (user or {}).get("bio_short") or parser.bio
+        if bio:
+            profile_data["bio"] = bio.strip()
+        if parser.title:
+            profile_data["title"] = parser.title
+
+        all_links = list(parser.hrefs)
+        if user:
+            all_links.extend(links_from_user_json(user))
+        for text in parser.text_chunks:
+            if "http" in text:
+                all_links.extend(TEXT_URL_RE.findall(text))
+
+        if all_links:
+            profile_data.update(self.extract_socials(all_links))
+        return profile_data
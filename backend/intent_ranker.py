@@ -0,0 +1,112 @@
+# Local BM25 ranking of contacts against the user's intent, before anything is sent to n8n
+
+from collections import Counter
+from urllib.parse import urlparse
+import math
+import re
+
+from social_classifier import SOCIAL_KEYS
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset("""
+a about an and any are as at be but by can for from has have i in interested into is it its looking me
+my of on or our people person some someone that the their them they this those to want we who with
+you your find meet connect relevant
+""".split())
+# Field weights: a term in the job title says more than one in a long bio
+TITLE_WEIGHT = 2
+BIO_WEIGHT = 1
+# Website host parts that carry no meaning
+HOST_NOISE = frozenset(["www", "com", "org", "net", "io", "co", "dev", "ai", "app", "me", "xyz", "html"])
+
+
+def _stem(token):
+    # Just enough folding for "founders" ~ "founder" and "investing" ~ "invest"
+    for suffix in ("ing", "ers", "es", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4 and not token.endswith("ss"):
+            return token[:-len(suffix)] + ("er" if suffix == "ers" else "")
+    return token
+
+
+def tokenize(text):
+    return [_stem(t) for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def link_terms(contact):
+    """Terms for the platforms a contact links to and the words in their website hosts"""
+    terms = [key[:-len("_url")] for key in SOCIAL_KEYS if contact.get(key)]
+    links = [contact.get("website_url")] + (contact.get("other_social_links") or []) + (contact.get("other_links") or [])
+    for link in filter(None, links):
+        host = urlparse(link).hostname or ""
+        terms.extend(part for part in re.split(r"[.\-]", host) if part and part not in HOST_NOISE)
+    return terms
+
+
+def contact_terms(contact):
+    """Bag of weighted terms for a contact: title, bio (or guest-list bio) and link signals"""
+    terms = tokenize(contact.get("title")) * TITLE_WEIGHT
+    terms += tokenize(contact.get("bio") or contact.get("bio_short")) * BIO_WEIGHT
+    terms += [_stem(t) for t in link_terms(contact)]
+    return terms
+
+
+class IntentRanker:
+    """Okapi BM25 over one event's contacts.
+
+    Each contact is a small document (see ``contact_terms``); the intent is
+    the query. Scores are only comparable within one event, where the
+    attendee list itself supplies the IDF statistics, so common words at a
+    tech meetup ("engineer") count for less than rare ones ("climate").
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+
+    def score(self, contacts, intent):
+        """BM25 score of every contact (in input order) and the intent terms it matched"""
+        query = list(dict.fromkeys(tokenize(intent)))
+        docs = [Counter(contact_terms(c)) for c in contacts]
+        if not query or not docs:
+            return [(0.0, []) for _ in contacts]
+        avg_len = sum(sum(d.values()) for d in docs) / len(docs) or 1.0
+        idf = {}
+        for term in query:
+            df = sum(1 for d in docs if term in d)
+            idf[term] = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+
+        results = []
+        for doc in docs:
+            length_norm = self.k1 * (1 - self.b + self.b * sum(doc.values()) / avg_len)
+            total, matched = 0.0, []
+            for term in query:
+                tf = doc.get(term)
+                if tf:
+                    total += idf[term] * tf * (self.k1 + 1) / (tf + length_norm)
+                    matched.append(term)
+            results.append((round(total, 4), matched))
+        return results
+
+    def rank(self, contacts, intent, top_k=0):
+        """Contacts with ``match_score``/``match_terms`` attached, best first, cut to ``top_k`` (0 = all).
+
+        Ties keep guest-list order, so an empty intent leaves the list as it was.
+        """
+        scored = [
+            {**contact, "match_score": score, "match_terms": matched}
+            for contact, (score, matched) in zip(contacts, self.score(contacts, intent))
+        ]
+        ranked = sorted(scored, key=lambda c: -c["match_score"])
+        return ranked[:top_k] if top_k else ranked
+
+
+def priority(basic_contact, intent_terms):
+    """Cheap pre-score used to order profile visits before the full corpus exists.
+
+    Counts intent terms found in what the guest list already shows (guest-list
+    bio and link signals); higher means "visit sooner".
+    """
+    if not intent_terms:
+        return 0
+    terms = set(contact_terms({**basic_contact.get("modal_socials", {}), **basic_contact}))
+    return sum(1 for term in intent_terms if term in terms)
@@ -0,0 +1,121 @@
+# Background job queue for scrape requests
+
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class JobQueue:
+    """In-process job queue drained by a bounded pool of worker threads.
+
+    Each job is a plain dict tracked by id so the API can report status and
+    results after the HTTP request that created it has returned.
+    """
+
+    def __init__(self, handler, num_workers=2, max_queued=100, max_history=500):
+        self.handler = handler
+        self.num_workers = num_workers
+        self.max_history = max_history
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        with self._start_lock:
+            if self._workers:
+                return
+            for i in range(self.num_workers):
+                worker = threading.Thread(target=self._worker_loop, name=f"scrape-worker-{i+1}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        print(f"🧵 Started {self.num_workers} scrape workers")
+
+    def submit(self, params):
+        """Enqueue a job and return a snapshot of its record"""
+        self.start()  # Lazily start workers when not run via __main__ (e.g. gunicorn)
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "params": params,
+            "result": None,
+            "error": None,
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "started_at": None,
+            "finished_at": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+        try:
+            self._queue.put_nowait(job_id)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            raise QueueFullError(f"Job queue is full ({self._queue.maxsize} pending)")
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """Return a copy of the job record, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "workers": self.num_workers,
+            "queued": self._queue.qsize(),
+            "jobs": counts,
+        }
+
+    def _prune(self):
+        # Drop the oldest finished jobs once history exceeds its bound
+        excess = len(self._jobs) - self.max_history
+        if excess <= 0:
+            return
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id]["status"] in ("completed", "failed"):
+                del self._jobs[job_id]
+                excess -= 1
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields)
+            return job
+
+    def _worker_loop(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                job = self._update(job_id, status="running", started_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+                if not job:
+                    continue
+                print(f"▶️ Job {job_id} started")
+                try:
+                    result = self.handler(job["params"])
+                    self._update(job_id, status="completed", result=result,
+                                 finished_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+                    print(f"✅ Job {job_id} completed")
+                except Exception as e:
+                    print(f"❌ Job {job_id} failed: {e}")
+                    self._update(job_id, status="failed", error=str(e),
+                                 finished_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+            finally:
+                self._queue.task_done()
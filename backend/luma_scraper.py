@@ -6,26 +6,63 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import json
+import os
 import time
-import requests
 import sys
-import re
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin
+from driver_pool import DriverPool
+from luma_session import LumaSession, SessionExpiredError, is_logged_out_url
+from page_waits import wait_for_event_page, wait_for_profile
+from resource_blocking import apply_to_options, enable_blocking
+from profile_fetcher import ProfileFetchStage
+from guest_modal import iter_modal_guests
+from profile_page import extract_profile_page
+from social_classifier import classify_links
+from webhook_outbox import WebhookOutbox
+from rate_limiter import HostRateLimiter
+from event_snapshots import EventSnapshotStore, GuestListDiff
+from run_checkpoints import CheckpointStore
+from contact_store import ContactStore
+from intent_ranker import IntentRanker, priority, tokenize
 
 # --- Config ---
-MAX_USERS = 20
-N8N_WEBHOOK = "https://qrenaud.app.n8n.cloud/webhook/user"
+MAX_USERS = int(os.getenv("MAX_USERS", "20"))
+N8N_WEBHOOK = os.getenv("N8N_WEBHOOK_URL", "https://qrenaud.app.n8n.cloud/webhook/user")
+HEADLESS = os.getenv("HEADLESS", "0") == "1"  # Visible browser by default
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "webhook_outbox.db")  # Shared with the API's outbox
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "event_snapshots.db")  # Guest-list snapshots, shared with the API
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", str(7 * 24 * 3600)))  # Seconds a snapshot profile is reused
+DELIVERY_DELTA_ONLY = os.getenv("DELIVERY_DELTA_ONLY", "0") == "1"  # Send only new/changed guests to n8n
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "scrape_runs.db")  # Per-run progress, shared with the API
+CONTACT_STORE_PATH = os.getenv("CONTACT_STORE_PATH", "contacts.db")  # Every person scraped, shared with the API
+RANK_TOP_K = int(os.getenv("RANK_TOP_K", "0"))  # Best-matching contacts sent to n8n (0 = all, ranked)
 PROFILE_SCRAPING_ENABLED = True  # Set to False to disable profile visiting
+PROFILE_CONCURRENCY = int(os.getenv("PROFILE_CONCURRENCY", "3"))  # Main driver + headless profile helpers
+DRIVER_MAX_NAVIGATIONS = int(os.getenv("DRIVER_MAX_NAVIGATIONS", "200"))  # Page loads before a helper is swapped
+DRIVER_MAX_RSS_MB = int(os.getenv("DRIVER_MAX_RSS_MB", "1024"))  # Chrome memory (MB) before a helper is swapped
 
 # --- Input ---
-if len(sys.argv) < 2:
+if len(sys.argv) < 2 or (sys.argv[1] == "--resume" and len(sys.argv) < 3):
     print("❌ Error: Missing event URL as argument.")
     print("Usage: python luma_scraper.py <event_url> [user_intent]")
+    print("       python luma_scraper.py --resume <run_id>")
     sys.exit(1)
 
-event_url = sys.argv[1]
-user_intent = sys.argv[2] if len(sys.argv) > 2 else "Find relevant people"
+# Progress is checkpointed as the run goes, so a crash can be resumed with --resume <run_id>
+checkpoints = CheckpointStore(CHECKPOINT_PATH)
+if sys.argv[1] == "--resume":
+    try:
+        run = checkpoints.resume(sys.argv[2])
+    except (KeyError, ValueError) as e:
+        print(f"❌ {e.args[0]}")
+        sys.exit(1)
+    event_url = run.event_url
+    user_intent = run.params["user_intent"]
+else:
+    event_url = sys.argv[1]
+    user_intent = sys.argv[2] if len(sys.argv) > 2 else "Find relevant people"
+    run = checkpoints.start(event_url, {"event_url": event_url, "user_intent": user_intent})
+    print(f"🧷 Run {run.run_id} (resume with: python luma_scraper.py --resume {run.run_id})")
 
 print(f"🔍 Scraping event: {event_url}")
 print(f"👤 User intent: {user_intent}")
@@ -54,73 +91,7 @@ def extract_socials(links):
 
 def extract_enhanced_socials(links):
     """Enhanced social media extraction with more platforms and better detection"""
-    socials = {
-        "linkedin_url": None,
-        "twitter_url": None,
-        "instagram_url": None,
-        "github_url": None,
-        "youtube_url": None,
-        "tiktok_url": None,
-        "facebook_url": None,
-        "medium_url": None,
-        "website_url": None,
-        "other_social_links": []
-    }
-    
-    # Clean and deduplicate links
-    clean_links = []
-    for href in links:
-        if not href or not isinstance(href, str):
-            continue
-        href = href.strip()
-        if href.startswith("http") and "lu.ma" not in href:
-            clean_links.append(href)
-    
-    clean_links = list(set(clean_links))  # Remove duplicates
-    
-    # Social platform patterns
-    patterns = {
-        "linkedin_url": [r"linkedin\.com/in/", r"linkedin\.com/company/"],
-        "twitter_url": [r"(?:twitter\.com|x\.com)/", r"t\.co/"],
-        "instagram_url": [r"instagram\.com/"],
-        "github_url": [r"github\.com/"],
-        "youtube_url": [r"youtube\.com/", r"youtu\.be/"],
-        "tiktok_url": [r"tiktok\.com/"],
-        "facebook_url": [r"facebook\.com/", r"fb\.com/"],
-        "medium_url": [r"medium\.com/", r".*\.medium\.com"],
-    }
-    
-    # Categorize links
-    for href in clean_links:
-        categorized = False
-        
-        # Check against social patterns
-        for social_key, platform_patterns in patterns.items():
-            for pattern in platform_patterns:
-                if re.search(pattern, href, re.IGNORECASE):
-                    if not socials[social_key]:  # Only set if not already found
-                        socials[social_key] = href
-                    categorized = True
-                    break
-            if categorized:
-                break
-        
-        # If not a recognized social platform, check if it's a personal website
-        if not categorized:
-            domain = urlparse(href).netloc.lower()
-            # Skip common non-personal domains
-            skip_domains = [
-                'google.com', 'gmail.com', 'outlook.com', 'yahoo.com',
-                'zoom.us', 'calendly.com', 'eventbrite.com',
-                'amazon.com', 'apple.com', 'microsoft.com'
-            ]
-            if not any(skip in domain for skip in skip_domains):
-                if not socials["website_url"]:  # Use first non-social link as website
-                    socials["website_url"] = href
-                else:
-                    socials["other_social_links"].append(href)
-    
-    return socials
+    return classify_links(links)
 
 def scrape_user_profile(driver, profile_url, max_retries=2):
     """Visit user profile and extract comprehensive social links and bio data"""
@@ -132,71 +103,18 @@ def scrape_user_profile(driver, profile_url, max_retries=2):
             print(f"   🔍 Visiting profile: {profile_url} (attempt {attempt+1})")
             
             # Visit profile page
-            driver.get(profile_url)
-            time.sleep(2)  # Rate limiting
+            rate_limiter.navigate(driver, profile_url)
+            wait_for_profile(driver)
             
-            profile_data = {}
-            
-            # Extract bio/description
-            try:
-                bio_selectors = [
-                    ".bio", ".description", ".about", 
-                    "[data-testid='bio']", ".user-bio",
-                    "//div[contains(@class, 'bio')]",
-                    "//div[contains(@class, 'description')]"
-                ]
-                for selector in bio_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            bio_elem = driver.find_element(By.XPATH, selector)
-                        else:
-                            bio_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                        if bio_elem and bio_elem.text.strip():
-                            profile_data["bio"] = bio_elem.text.strip()
-                            break
-                    except:
-                        continue
-            except:
-                pass
+            # Bio, title, every anchor href and URLs embedded in text, in one round trip
+            page = extract_profile_page(driver)
 
-            # Extract title/job
-            try:
-                title_selectors = [
-                    ".title", ".job-title", ".position",
-                    ".headline", ".user-title",
-                    "//div[contains(@class, 'title')]",
-                    "//div[contains(@class, 'job')]"
-                ]
-                for selector in title_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            title_elem = driver.find_element(By.XPATH, selector)
-                        else:
-                            title_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                        if title_elem and title_elem.text.strip():
-                            profile_data["title"] = title_elem.text.strip()
-                            break
-                    except:
-                        continue
-            except:
-                pass
-
-            # Extract ALL links from profile page
-            all_links = []
-            try:
-                link_elements = driver.find_elements(By.TAG_NAME, "a")
-                all_links = [link.get_attribute("href") for link in link_elements if link.get_attribute("href")]
-                
-                # Also check for links in text (common pattern on Luma)
-                text_elements = driver.find_elements(By.XPATH, "//*[contains(text(), 'http')]")
-                for elem in text_elements:
-                    text = elem.text
-                    # Extract URLs from text using regex
-                    urls = re.findall(r'https?://[^\s<>"]+', text)
-                    all_links.extend(urls)
-                    
-            except Exception as e:
-                print(f"   ⚠️ Error extracting links: {e}")
+            profile_data = {}
+            if page["bio"]:
+                profile_data["bio"] = page["bio"]
+            if page["title"]:
+                profile_data["title"] = page["title"]
+            all_links = page["hrefs"] + page["text_urls"]
 
             # Enhanced social extraction
             if all_links:
@@ -212,141 +130,151 @@ def scrape_user_profile(driver, profile_url, max_retries=2):
             print(f"   ❌ Profile scraping attempt {attempt+1} failed: {e}")
             if attempt == max_retries - 1:
                 return {}
-            time.sleep(1)
+            # No pause needed: the retry's own page wait paces it
     
     return {}
 
-def send_to_n8n(contacts_data):
-    """Send all contacts data to n8n webhook for AI processing"""
-    headers = {
-        "Content-Type": "application/json",
-        "User-Agent": "Luma-Scraper/1.0"
-    }
-    
+def send_to_n8n(contacts_data, total_found, diff):
+    """Queue the contacts for the n8n webhook and deliver them through the outbox"""
     payload = {
         "event_url": event_url,
         "user_intent": user_intent,
         "contacts": contacts_data,
-        "total_found": len(contacts_data),
+        "total_found": total_found,
+        "delta_only": DELIVERY_DELTA_ONLY,
+        "top_k": RANK_TOP_K,
+        "diff": diff,
         "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S")
     }
     
-    try:
-        print(f"🚀 Sending {len(contacts_data)} contacts to n8n...")
-        res = requests.post(N8N_WEBHOOK, headers=headers, json=payload, timeout=30)
-        
-        if res.status_code == 200:
-            print(f"✅ Successfully sent to n8n: {len(contacts_data)} contacts")
-        else:
-            print(f"❌ n8n webhook error: {res.status_code} - {res.text}")
-            
-    except requests.exceptions.Timeout:
-        print("❌ n8n webhook timeout after 30 seconds")
-    except requests.exceptions.ConnectionError:
-        print("❌ Could not connect to n8n webhook")
-    except Exception as e:
-        print(f"❌ n8n webhook error: {e}")
+    # Persisted first, so a webhook outage never loses the scrape
+    message_id = outbox.enqueue(N8N_WEBHOOK, payload)
+    print(f"🚀 Sending {len(contacts_data)} contacts to n8n (outbox message {message_id})...")
+    remaining = outbox.flush(timeout=60)
+    if remaining:
+        print(f"⚠️ {remaining} deliveries still pending in {OUTBOX_PATH}; they are retried on the next run or by the API")
+
+outbox = WebhookOutbox(OUTBOX_PATH)
+
+# --- Check the Luma session before launching anything ---
+rate_limiter = HostRateLimiter()  # Paces the main driver, helpers and session checks together
+luma_session = LumaSession(rate_limiter=rate_limiter)
+try:
+    luma_session.ensure_valid()
+except SessionExpiredError as e:
+    print(f"❌ {e}")
+    run.finish(error=e)
+    sys.exit(1)
 
 # --- Setup Browser ---
 options = Options()
+if HEADLESS:
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
 options.add_argument("--user-data-dir=/tmp/chrome-user-data")
 options.add_argument("--disable-blink-features=AutomationControlled")
 options.add_experimental_option("excludeSwitches", ["enable-automation"])
 options.add_experimental_option('useAutomationExtension', False)
+apply_to_options(options)  # No images; see RESOURCE_BLOCKING
 
 driver = webdriver.Chrome(options=options)
 driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+enable_blocking(driver)  # Fonts, media and trackers
 
 # --- Login via cookies ---
-driver.get("https://lu.ma/")
-time.sleep(3)
-
-with open("cookies.json", "r") as f:
-    cookies = json.load(f)
-
-for cookie in cookies:
-    for k in ["sameSite", "storeId", "hostOnly", "session"]:
-        cookie.pop(k, None)
-    driver.add_cookie(cookie)
-
-# --- Visit Event Page ---
-driver.get(event_url)
-print(f"📄 Page title after login: {driver.title}")
-time.sleep(5)
-
-# --- Open Guest List Modal ---
-wait = WebDriverWait(driver, 10)
-try:
-    guest_trigger = wait.until(EC.element_to_be_clickable((By.XPATH, "//div[contains(text(), 'others')]")))
-    guest_trigger.click()
-except TimeoutException:
-    print("⚠️ Could not find guest list trigger, trying alternative selectors...")
-    # Try alternative selectors for guest list
-    guest_triggers = [
-        "//div[contains(text(), 'guest')]",
-        "//div[contains(text(), 'attendee')]",
-        "//button[contains(text(), 'guest')]"
-    ]
-    for selector in guest_triggers:
-        try:
-            guest_trigger = driver.find_element(By.XPATH, selector)
-            guest_trigger.click()
-            break
-        except:
-            continue
-
-modal = WebDriverWait(driver, 10).until(
-    EC.presence_of_element_located((By.CLASS_NAME, "lux-modal-body"))
-)
-
-# Scroll to load all guests
-print("📜 Loading all guests...")
-for i in range(8):
-    driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", modal)
-    time.sleep(1)
-    print(f"   Scroll {i+1}/8")
+luma_session.apply_to_driver(driver)
+
+# --- Visit Event Page (skipped when resuming a run whose guest list is stored) ---
+if not run.guest_list_complete:
+    rate_limiter.navigate(driver, event_url)
+    print(f"📄 Page title after login: {driver.title}")
+    wait_for_event_page(driver)
+    if is_logged_out_url(driver.current_url):
+        print("🔒 Event page redirected to sign-in")
+        if not luma_session.report_logged_out():
+            print(f"❌ Luma session expired: export fresh cookies to {luma_session.cookies_file}")
+            run.finish(error="Luma session expired")
+            driver.quit()
+            sys.exit(1)
+        luma_session.apply_to_driver(driver)
+        rate_limiter.navigate(driver, event_url)
+        wait_for_event_page(driver)
+
+    # --- Open Guest List Modal ---
+    wait = WebDriverWait(driver, 10)
+    try:
+        guest_trigger = wait.until(EC.element_to_be_clickable((By.XPATH, "//div[contains(text(), 'others')]")))
+        guest_trigger.click()
+    except TimeoutException:
+        print("⚠️ Could not find guest list trigger, trying alternative selectors...")
+        # Try alternative selectors for guest list
+        guest_triggers = [
+            "//div[contains(text(), 'guest')]",
+            "//div[contains(text(), 'attendee')]",
+            "//button[contains(text(), 'guest')]"
+        ]
+        for selector in guest_triggers:
+            try:
+                guest_trigger = driver.find_element(By.XPATH, selector)
+                guest_trigger.click()
+                break
+            except:
+                continue
 
 # --- Scrape Guests ---
-guest_blocks = driver.find_elements(By.XPATH, "//div[contains(@class, 'gap-2 spread')]")
-print(f"👥 Found {len(guest_blocks)} guests in modal")
-
-# First, extract all basic data from modal (avoid stale references)
+# Rows are harvested while the modal scrolls; helper drivers start visiting profiles meanwhile
 basic_contacts = []
-for idx, guest in enumerate(guest_blocks):
-    if idx >= MAX_USERS:
-        print(f"🚫 Reached max users limit ({MAX_USERS})")
-        break
-
-    try:
-        name = guest.find_element(By.CLASS_NAME, "name").text.strip()
-    except:
-        name = "Unknown"
-
-    try:
-        profile_elem = guest.find_element(By.XPATH, ".//a[contains(@href, '/user/')]")
-        profile_url = profile_elem.get_attribute("href")
-        if profile_url.startswith("/user/"):
-            profile_url = "https://lu.ma" + profile_url
-    except:
-        profile_url = None
-
-    # Extract basic social links from modal (before navigation)
-    try:
-        raw_links = [l.get_attribute("href") for l in guest.find_elements(By.TAG_NAME, "a")]
-        cleaned_links = list(set([link for link in raw_links if link]))
-        modal_socials = extract_socials(cleaned_links)
-    except:
-        modal_socials = {}
-
-    basic_contacts.append({
-        "name": name,
-        "profile_url": profile_url,
-        "modal_socials": modal_socials
-    })
+guest_diff = GuestListDiff(EventSnapshotStore(SNAPSHOT_PATH), event_url,
+                           max_age=PROFILE_CACHE_TTL)  # Skips guests unchanged since last run
+helper_pool = DriverPool(size=PROFILE_CONCURRENCY - 1, session=luma_session,
+                         max_navigations=DRIVER_MAX_NAVIGATIONS, max_rss_mb=DRIVER_MAX_RSS_MB)
+stage = ProfileFetchStage(scrape_user_profile, recycle=helper_pool.recycle_if_needed,
+                          on_result=lambda idx: run.save_profile(idx, stage.results[idx]))
+helpers = []
+try:
+    if PROFILE_SCRAPING_ENABLED:
+        for _ in range(PROFILE_CONCURRENCY - 1):
+            helper = helper_pool.try_acquire()
+            if helper is None:
+                break
+            helpers.append(helper)
+            stage.add_driver(helper)
 
-# Now process each contact with enhanced profile visiting
+    if run.guest_list_complete:
+        guests = iter(run.guests)
+    else:
+        guests = run.record_guests(iter_modal_guests(driver, extract_socials, MAX_USERS))
+    intent_terms = tokenize(user_intent)  # Guests matching the intent are visited first
+    for idx, basic_contact in enumerate(guests):
+        basic_contacts.append(basic_contact)
+        basic_contact["guest_status"], reused = guest_diff.classify(idx, basic_contact)
+        if not PROFILE_SCRAPING_ENABLED or not basic_contact["profile_url"]:
+            continue
+        reused = reused or run.done_profile(basic_contact)
+        if reused:
+            stage.set_result(idx, reused)
+        else:
+            stage.submit(idx, basic_contact["profile_url"], priority=priority(basic_contact, intent_terms))
+
+    # The main driver joins the profile workers once the guest list is done
+    print(f"🔍 Visiting remaining profiles with {len(helpers) + 1} drivers")
+    stage.finish(driver)
+except Exception as e:
+    run.finish(error=e)  # Resumable with --resume
+    raise
+finally:
+    stage.cancel()
+    for helper in helpers:
+        helper_pool.release(helper)
+    helper_pool.shutdown()
+
+profile_results = [stage.results.get(idx, {}) for idx in range(len(basic_contacts))]
+diff = guest_diff.commit(basic_contacts, profile_results, truncated=len(basic_contacts) >= MAX_USERS)
+
+# Now process each contact with its profile data
 contacts = []
-for idx, basic_contact in enumerate(basic_contacts):
+for idx, (basic_contact, profile_data) in enumerate(zip(basic_contacts, profile_results)):
     name = basic_contact["name"]
     profile_url = basic_contact["profile_url"]
     
@@ -356,12 +284,11 @@ for idx, basic_contact in enumerate(basic_contacts):
         "name": name,
         "profile_url": profile_url,
         "profile_scraped": False,
+        "guest_status": basic_contact["guest_status"],
         **basic_contact["modal_socials"]
     }
 
-    # Enhanced: Visit user profile for comprehensive social links
     if PROFILE_SCRAPING_ENABLED and profile_url:
-        profile_data = scrape_user_profile(driver, profile_url)
         if profile_data:
             contact.update(profile_data)
             contact["profile_scraped"] = True
@@ -373,9 +300,20 @@ for idx, basic_contact in enumerate(basic_contacts):
 
     contacts.append(contact)
 
-# --- Send all contacts to n8n ---
-send_to_n8n(contacts)
+ContactStore(CONTACT_STORE_PATH).record_event(event_url, contacts)
+
+# --- Rank against the intent and send the best matches to n8n (only new and changed guests with DELIVERY_DELTA_ONLY) ---
+ranked = IntentRanker().rank(contacts, user_intent)
+for contact in ranked[:5]:
+    if contact["match_score"] > 0:
+        print(f"🎯 {contact['name']}: {contact['match_score']} ({', '.join(contact['match_terms'])})")
+delta = [c for c in ranked if not DELIVERY_DELTA_ONLY or c["guest_status"] != "unchanged"]
+if delta or diff["removed"]:
+    send_to_n8n(delta[:RANK_TOP_K] if RANK_TOP_K else delta, len(contacts), diff)
+else:
+    print("💤 No guest-list changes since the last run; nothing sent to n8n")
 
 # --- Cleanup ---
+run.finish()
 driver.quit()
 print(f"✅ Done scraping! {len(contacts)} contacts collected and sent to n8n")
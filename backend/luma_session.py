@@ -0,0 +1,195 @@
+# Process-wide Luma login: cookies loaded once, validated, and shared by every driver and HTTP client
+
+from urllib.parse import urlparse
+import json
+import os
+import threading
+import time
+import requests
+from page_waits import wait_for_home
+from rate_limiter import HostRateLimiter
+
+LUMA_BASE_URL = os.getenv("LUMA_BASE_URL", "https://lu.ma").rstrip("/")  # Overridden by the offline benchmarks
+LUMA_HOME = LUMA_BASE_URL + "/"
+LUMA_API_URL = os.getenv("LUMA_API_URL", "https://api.lu.ma").rstrip("/")
+COOKIES_FILE = "cookies.json"
+# Cheap authenticated request: 200 when logged in, 401/403 when the session expired
+SESSION_CHECK_URL = os.getenv("LUMA_SESSION_CHECK_URL", LUMA_API_URL + "/user")
+SESSION_CHECK_INTERVAL = int(os.getenv("LUMA_SESSION_CHECK_INTERVAL", "600"))  # Seconds between re-validations
+
+# Browser-extension export fields that neither Chrome nor requests accept
+EXPORT_ONLY_FIELDS = ("sameSite", "storeId", "hostOnly", "session", "id")
+LOGGED_OUT_PATHS = ("/signin", "/login")
+
+
+class SessionExpiredError(RuntimeError):
+    """The Luma session cookies are no longer accepted"""
+
+
+def is_logged_out_url(url):
+    """True for the pages Luma redirects to when the session is missing or expired"""
+    path = urlparse(url or "").path
+    return path.startswith(LOGGED_OUT_PATHS)
+
+
+def sanitize_cookie(cookie, default_domain):
+    """Exported browser cookie -> ``{name, value, domain, path, secure, httpOnly, expires}``"""
+    cookie = {k: v for k, v in cookie.items() if k not in EXPORT_ONLY_FIELDS}
+    expires = cookie.pop("expirationDate", None) or cookie.pop("expiry", None)
+    clean = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "domain": cookie.get("domain") or default_domain,
+        "path": cookie.get("path", "/"),
+        "secure": bool(cookie.get("secure", False)),
+        "httpOnly": bool(cookie.get("httpOnly", False)),
+    }
+    if expires:
+        clean["expires"] = int(expires)
+    return clean
+
+
+class LumaSession:
+    """Sanitized Luma session cookies shared by all Chrome drivers and HTTP clients.
+
+    Cookies are read from ``cookies_file`` once and re-read only when the
+    file changes or a logged-out page is reported. ``version`` increases
+    each time a different set of cookies is loaded, so drivers and HTTP
+    sessions can tell that theirs are stale. ``ensure_valid`` checks the
+    login with a single authenticated request (at most every
+    ``check_interval`` seconds) and raises ``SessionExpiredError`` when Luma
+    rejects it, instead of letting scrapes silently come back empty.
+    """
+
+    def __init__(self, cookies_file=COOKIES_FILE, check_url=SESSION_CHECK_URL,
+                 check_interval=SESSION_CHECK_INTERVAL, rate_limiter=None):
+        self.cookies_file = cookies_file
+        self.check_url = check_url
+        self.check_interval = check_interval
+        self.cookies = []
+        self.version = 0
+        self.valid = None  # None until checked (or when the check could not reach Luma)
+        self.user_name = None
+        self.checked_at = 0
+        self.refreshes = 0
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self._mtime = None
+        self._lock = threading.RLock()
+        self._http = requests.Session()
+        self.reload()
+
+    def reload(self):
+        """Re-read the cookies file if it changed; returns True if new cookies were loaded"""
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(self.cookies_file)
+                if mtime == self._mtime:
+                    return False
+                with open(self.cookies_file, "r") as f:
+                    raw = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not load Luma cookies from {self.cookies_file}: {e}")
+                return False
+            host = urlparse(LUMA_BASE_URL).hostname
+            # Host-only cookie for IPs/localhost (the offline benchmarks), else the whole domain
+            default_domain = host if host == "localhost" or host.replace(".", "").isdigit() else "." + host
+            self.cookies = [sanitize_cookie(c, default_domain) for c in raw if "name" in c and "value" in c]
+            self._mtime = mtime
+            self.version += 1
+            self._http.cookies.clear()
+            self.apply_to_requests(self._http)
+            self.checked_at = 0  # New cookies need a fresh check
+            print(f"🍪 Loaded {len(self.cookies)} Luma cookies (session v{self.version})")
+            return True
+
+    def validate(self):
+        """One authenticated request; returns True/False, or None if Luma could not be reached"""
+        self.rate_limiter.acquire(self.check_url)
+        try:
+            res = self._http.get(self.check_url, timeout=10, allow_redirects=False,
+                                 headers={"Accept": "application/json"})
+        except requests.exceptions.RequestException as e:
+            print(f"⚠️ Could not validate Luma session: {e}")
+            return None
+        if not self.rate_limiter.report_response(res):
+            print(f"⚠️ Luma session check throttled (HTTP {res.status_code})")
+            return None
+        with self._lock:
+            self.checked_at = time.time()
+            if res.status_code == 200:
+                self.valid = True
+                try:
+                    body = res.json()
+                    user = body.get("user", body) if isinstance(body, dict) else {}
+                    self.user_name = user.get("name") if isinstance(user, dict) else None
+                except ValueError:
+                    self.user_name = None
+            elif res.status_code in (401, 403) or is_logged_out_url(res.headers.get("Location")):
+                self.valid = False
+            else:
+                print(f"⚠️ Luma session check returned HTTP {res.status_code}")
+                return None
+            print(f"🔐 Luma session {'valid' if self.valid else 'EXPIRED'}"
+                  + (f" ({self.user_name})" if self.valid and self.user_name else ""))
+            return self.valid
+
+    def ensure_valid(self):
+        """Re-validate if the last check is stale; raise SessionExpiredError if logged out"""
+        with self._lock:
+            self.reload()
+            if self.valid is False or time.time() - self.checked_at >= self.check_interval:
+                self.validate()
+            if self.valid is False:
+                raise SessionExpiredError(f"Luma session expired: export fresh cookies to {self.cookies_file}")
+
+    def report_logged_out(self):
+        """Called when a page or API response shows we are logged out.
+
+        Picks up a replaced cookies file and re-validates. Returns True if a
+        new, valid session is now available (callers re-apply and retry).
+        """
+        with self._lock:
+            self.refreshes += 1
+            changed = self.reload()
+            valid = self.validate()
+            if valid is None:
+                self.valid = False  # The page already told us we are logged out
+            return changed and bool(valid)
+
+    def apply_to_requests(self, session):
+        """Install the cookies in a ``requests.Session``; returns the version applied"""
+        with self._lock:
+            for cookie in self.cookies:
+                session.cookies.set(cookie["name"], cookie["value"],
+                                    domain=cookie["domain"], path=cookie["path"])
+            return self.version
+
+    def apply_to_driver(self, driver):
+        """Install the cookies in a Chrome driver; returns the version applied.
+
+        Uses DevTools ``Network.setCookies``, which needs no page load; falls
+        back to opening the Luma homepage and adding them one by one.
+        """
+        with self._lock:
+            cookies, version = list(self.cookies), self.version
+        try:
+            driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+        except Exception:
+            self.rate_limiter.navigate(driver, LUMA_HOME)
+            wait_for_home(driver)
+            for cookie in cookies:
+                cookie = {k: v for k, v in cookie.items() if k != "expires"}
+                driver.add_cookie(cookie)
+        return version
+
+    def stats(self):
+        with self._lock:
+            return {
+                "valid": self.valid,
+                "user": self.user_name,
+                "version": self.version,
+                "cookies": len(self.cookies),
+                "checked_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.checked_at))
+                if self.checked_at else None,
+                "refreshes": self.refreshes,
+            }
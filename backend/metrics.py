@@ -0,0 +1,181 @@
+# Prometheus metrics for the scraper, rendered in the text exposition format for /metrics
+
+from contextlib import contextmanager
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}  # label values tuple -> value
+        _REGISTRY.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        with self._lock:
+            return [(self.name, list(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, pairs, value in self._samples():
+            lines.append(f"{name}{_format_labels(pairs)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Observations bucketed by upper bound, with running sum and count"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["buckets"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the ``with`` block, including when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        samples = []
+        with self._lock:
+            items = [(key, {"buckets": list(s["buckets"]), "sum": s["sum"], "count": s["count"]})
+                     for key, s in self._values.items()]
+        for key, state in items:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["buckets"]):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", pairs + [("le", _format_value(bound))], cumulative))
+            samples.append((f"{self.name}_sum", pairs, state["sum"]))
+            samples.append((f"{self.name}_count", pairs, state["count"]))
+        return samples
+
+
+def observe_stream(histogram, stream, start, **labels):
+    """Yield from ``stream`` and observe the time from ``start`` until it is exhausted"""
+    try:
+        yield from stream
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+def render_metrics():
+    """All registered metrics in the Prometheus text format"""
+    lines = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Scraper metrics ---
+BROWSER_LAUNCH_SECONDS = Histogram(
+    "luma_browser_launch_seconds", "Time to launch a Chrome driver",
+    buckets=(0.5, 1, 2, 5, 10, 20, 30, 60))
+COOKIE_LOGIN_SECONDS = Histogram(
+    "luma_cookie_login_seconds",
+    "Time to install the shared session cookies in a driver (CDP, no page load unless CDP fails)",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10))
+EVENT_PAGE_LOAD_SECONDS = Histogram(
+    "luma_event_page_load_seconds", "Time to load an event page until the guest list can be opened",
+    buckets=(0.5, 1, 2, 5, 7.5, 10, 20, 30, 60))
+GUEST_LIST_SECONDS = Histogram(
+    "luma_guest_list_seconds", "Time from opening the guest list until every guest was read",
+    buckets=(1, 2, 5, 10, 30, 60, 120, 300, 600, 1200), labelnames=("source",))
+PROFILE_SCRAPE_SECONDS = Histogram(
+    "luma_profile_scrape_seconds", "Time to scrape one profile, retries included",
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 30), labelnames=("method",))
+PAGE_WAIT_SECONDS = Histogram(
+    "luma_page_wait_seconds", "Time spent waiting for a page to become ready",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 15), labelnames=("stage", "outcome"))
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "luma_rate_limit_wait_seconds", "Time a request waited for its host's rate limiter",
+    buckets=(0, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60), labelnames=("host",))
+WEBHOOK_DELIVERY_SECONDS = Histogram(
+    "luma_webhook_delivery_seconds", "Duration of one webhook POST attempt",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30), labelnames=("outcome",))
+
+PROFILES_SCRAPED = Counter(
+    "luma_profiles_scraped_total", "Profiles scraped successfully", labelnames=("method",))
+PROFILE_FAILURES = Counter(
+    "luma_profile_failures_total", "Profiles that could not be scraped (HTTP failures fall back to Chrome)",
+    labelnames=("method",))
+RETRIES = Counter(
+    "luma_retries_total", "Retried operations", labelnames=("stage",))
+
+RATE_LIMIT_BACKOFFS = Counter(
+    "luma_rate_limit_backoffs_total", "Times a host's request rate was lowered", labelnames=("host", "reason"))
+DRIVER_RECYCLES = Counter(
+    "luma_driver_recycles_total", "Drivers quit and replaced", labelnames=("reason",))
+
+ACTIVE_DRIVERS = Gauge("luma_active_drivers", "Chrome drivers checked out of the pool")
+LIVE_DRIVERS = Gauge("luma_live_drivers", "Chrome drivers launched by the pool (idle or in use)")
+QUEUED_JOBS = Gauge("luma_queued_jobs", "Scrape jobs waiting for a worker")
+RUNNING_JOBS = Gauge("luma_running_jobs", "Scrape jobs currently running")
+DRIVER_MEMORY_MB = Gauge("luma_driver_memory_mb", "Resident memory of all pooled Chrome drivers (MB)")
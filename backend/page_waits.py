@@ -0,0 +1,93 @@
+# Condition-driven page waits that replace fixed sleeps, with per-stage timeouts
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import JavascriptException, StaleElementReferenceException, TimeoutException
+import metrics
+import os
+import time
+
+# Max seconds each stage waits before carrying on as if the page were ready
+WAIT_TIMEOUTS = {
+    "home": float(os.getenv("WAIT_TIMEOUT_HOME", "10")),
+    "event": float(os.getenv("WAIT_TIMEOUT_EVENT", "15")),
+    "profile": float(os.getenv("WAIT_TIMEOUT_PROFILE", "10")),
+}
+POLL_INTERVAL = 0.1
+
+# Every selector the guest-list trigger is looked up with, as one XPath union
+GUEST_TRIGGER_XPATH = " | ".join([
+    "//div[contains(text(), 'others')]",
+    "//div[contains(text(), 'guest')]",
+    "//div[contains(text(), 'attendee')]",
+    "//button[contains(text(), 'guest')]",
+])
+
+# Loaded, and no resource has finished for ``idleMs`` (Resource Timing only lists
+# completed requests, so a page still fetching keeps pushing the last responseEnd)
+NETWORK_IDLE_JS = """
+const idleMs = arguments[0];
+if (document.readyState !== 'complete') return false;
+const entries = performance.getEntriesByType('resource');
+const lastEnd = entries.reduce((latest, e) => Math.max(latest, e.responseEnd), 0);
+return performance.now() - lastEnd >= idleMs;
+"""
+
+
+def document_interactive(driver):
+    """The document is parsed (enough to set cookies or query the DOM)"""
+    return driver.execute_script("return document.readyState") != "loading"
+
+
+def network_idle(idle_ms=500):
+    def condition(driver):
+        return driver.execute_script(NETWORK_IDLE_JS, idle_ms)
+    return condition
+
+
+def xpath_present(xpath):
+    def condition(driver):
+        return len(driver.find_elements(By.XPATH, xpath)) > 0
+    return condition
+
+
+def any_of(*conditions):
+    def condition(driver):
+        return any(check(driver) for check in conditions)
+    return condition
+
+
+def wait_until(driver, stage, condition, timeout=None):
+    """Poll ``condition(driver)`` until it holds or the stage timeout passes.
+
+    Never raises on timeout: callers carry on as they did after the old
+    fixed sleeps. The time actually waited is recorded per stage and outcome
+    in ``luma_page_wait_seconds``. Returns True if the condition was met.
+    """
+    timeout = WAIT_TIMEOUTS[stage] if timeout is None else timeout
+    start = time.perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL,
+                      ignored_exceptions=(JavascriptException, StaleElementReferenceException)).until(condition)
+        met = True
+    except TimeoutException:
+        met = False
+        print(f"⏳ {stage} page not ready after {timeout:g}s, continuing")
+    metrics.PAGE_WAIT_SECONDS.observe(time.perf_counter() - start, stage=stage,
+                                      outcome="ready" if met else "timeout")
+    return met
+
+
+def wait_for_home(driver):
+    """Luma homepage loaded far enough for the session cookies to be added"""
+    return wait_until(driver, "home", document_interactive)
+
+
+def wait_for_event_page(driver):
+    """Guest-list trigger rendered, or the page settled without one"""
+    return wait_until(driver, "event", any_of(xpath_present(GUEST_TRIGGER_XPATH), network_idle(1000)))
+
+
+def wait_for_profile(driver):
+    """Profile page loaded and its client-side requests have settled"""
+    return wait_until(driver, "profile", network_idle(300))
@@ -0,0 +1,113 @@
+# Persistent profile cache: SQLite on disk with an in-memory LRU in front
+
+from collections import OrderedDict
+from urllib.parse import urlparse
+import json
+import sqlite3
+import threading
+import time
+
+LUMA_HOSTS = {"lu.ma", "www.lu.ma", "luma.com", "www.luma.com"}
+
+
+def normalize_profile_url(profile_url):
+    """Canonical cache key for a Luma user URL (host alias, query and trailing slash removed)"""
+    if not profile_url:
+        return None
+    parts = urlparse(profile_url.strip())
+    host = parts.netloc.lower()
+    if host in LUMA_HOSTS:
+        host = "lu.ma"
+    path = parts.path.rstrip("/")
+    return f"https://{host}{path}"
+
+
+class ProfileCache:
+    """Caches scraped profile dicts keyed by normalized profile URL.
+
+    Entries older than ``ttl`` seconds are treated as misses. The most
+    recently used ``memory_size`` entries are also kept in memory so hot
+    profiles never touch SQLite.
+    """
+
+    def __init__(self, path="profile_cache.db", ttl=7 * 24 * 3600, memory_size=1000):
+        self.path = path
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self._memory = OrderedDict()  # key -> (scraped_at, profile_data)
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "stores": 0}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            " url TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " scraped_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, profile_url):
+        """Return the cached profile dict if fresh, else None"""
+        entry = self.get_entry(profile_url)
+        return entry[1] if entry else None
+
+    def get_entry(self, profile_url):
+        """Return ``(scraped_at, profile dict)`` if fresh, else None"""
+        key = normalize_profile_url(profile_url)
+        if not key:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] < self.ttl:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[0], dict(entry[1])
+
+            row = self._db.execute(
+                "SELECT data, scraped_at FROM profiles WHERE url = ?", (key,)
+            ).fetchone()
+            if not row:
+                self._stats["misses"] += 1
+                return None
+            if now - row[1] >= self.ttl:
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                self._memory.pop(key, None)
+                return None
+            profile_data = json.loads(row[0])
+            self._remember(key, row[1], profile_data)
+            self._stats["disk_hits"] += 1
+            return row[1], dict(profile_data)
+
+    def put(self, profile_url, profile_data):
+        """Store a successfully scraped profile (empty results are not cached)"""
+        key = normalize_profile_url(profile_url)
+        if not key or not profile_data:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO profiles (url, data, scraped_at) VALUES (?, ?, ?)",
+                (key, json.dumps(profile_data), now)
+            )
+            self._db.commit()
+            self._remember(key, now, dict(profile_data))
+            self._stats["stores"] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            hits = lookups - self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(hits / lookups, 3) if lookups else None,
+                "memory_entries": len(self._memory),
+                "ttl_seconds": self.ttl,
+            }
+
+    def _remember(self, key, scraped_at, profile_data):
+        self._memory[key] = (scraped_at, profile_data)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
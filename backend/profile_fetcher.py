@@ -0,0 +1,96 @@
+# Concurrent profile-fetch stage: spreads profile visits across several drivers
+
+import itertools
+import queue
+import threading
+import time
+
+
+class ProfileFetchStage:
+    """Streaming profile-fetch stage fed with (index, url) pairs as guests are found.
+
+    Each attached driver gets its own worker thread, so WebDriver sessions
+    are never shared. Work can be submitted while the guest list is still
+    loading; ``finish`` drains the rest, optionally on the caller's driver.
+    ``recycle(driver)`` runs after every profile and returns the driver the
+    worker continues with, so a pool can swap out a bloated Chrome mid-job.
+    Queued profiles are visited highest ``priority`` first, then in
+    submission order. Once the ``deadline`` (a ``time.monotonic()`` value)
+    passes, queued profiles are skipped instead of visited; a visit already
+    in progress still finishes.
+    """
+
+    def __init__(self, scrape_profile, on_result=None, recycle=None, deadline=None):
+        self.scrape_profile = scrape_profile
+        self.on_result = on_result  # Called with the index as each result lands
+        self.recycle = recycle
+        self.deadline = deadline
+        self.results = {}  # index -> profile dict
+        self.skipped = set()  # indexes dropped at the deadline
+        self._work = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._closed = threading.Event()
+        self._threads = []
+
+    def add_driver(self, driver):
+        thread = threading.Thread(target=self._worker, args=(driver,), daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def submit(self, idx, url, priority=0):
+        self._work.put((-priority, next(self._order), idx, url))
+
+    def set_result(self, idx, result):
+        self.results[idx] = result
+        if self.on_result:
+            self.on_result(idx)
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def skip(self, idx):
+        """Give up on a profile (deadline hit); ``on_result`` still fires so the guest is delivered"""
+        self.skipped.add(idx)
+        if self.on_result:
+            self.on_result(idx)
+
+    def pending(self):
+        return self._work.qsize()
+
+    def finish(self, driver=None):
+        """Stop accepting work and wait until every queued profile is scraped"""
+        self._closed.set()
+        if driver is not None:
+            self._worker(driver)
+        for thread in self._threads:
+            thread.join()
+
+    def cancel(self):
+        """Drop queued work and stop all worker threads"""
+        while True:
+            try:
+                self._work.get_nowait()
+            except queue.Empty:
+                break
+        self.finish()
+
+    def _worker(self, driver):
+        while True:
+            try:
+                _, _, idx, url = self._work.get(timeout=0.1)
+            except queue.Empty:
+                if self._closed.is_set():
+                    return
+                continue
+            if self.expired():
+                self.skip(idx)
+                continue
+            try:
+                result = self.scrape_profile(driver, url) or {}
+            except Exception as e:
+                print(f"   ❌ Profile worker error on {url}: {e}")
+                result = {}
+            self.set_result(idx, result)
+            if self.recycle:
+                driver = self.recycle(driver)
+
@@ -0,0 +1,82 @@
+# Single-call extractor for Luma profile pages (bio, title, links) run inside the browser
+
+import json
+import os
+
+# Tried in order; selectors starting with "//" are XPath, everything else is CSS.
+# Override with a JSON list in PROFILE_BIO_SELECTORS / PROFILE_TITLE_SELECTORS.
+DEFAULT_BIO_SELECTORS = [
+    ".bio", ".description", ".about",
+    "[data-testid='bio']", ".user-bio",
+    "//div[contains(@class, 'bio')]",
+    "//div[contains(@class, 'description')]"
+]
+DEFAULT_TITLE_SELECTORS = [
+    ".title", ".job-title", ".position",
+    ".headline", ".user-title",
+    "//div[contains(@class, 'title')]",
+    "//div[contains(@class, 'job')]"
+]
+
+
+def _selectors_from_env(name, default):
+    raw = os.getenv(name)
+    if not raw:
+        return default
+    try:
+        selectors = json.loads(raw)
+    except ValueError:
+        print(f"⚠️ Ignoring {name}: not a JSON list")
+        return default
+    return [s for s in selectors if isinstance(s, str)] or default
+
+
+BIO_SELECTORS = _selectors_from_env("PROFILE_BIO_SELECTORS", DEFAULT_BIO_SELECTORS)
+TITLE_SELECTORS = _selectors_from_env("PROFILE_TITLE_SELECTORS", DEFAULT_TITLE_SELECTORS)
+
+# Mirrors the old per-selector find_element probing: the first element matched by
+# each selector is used if it has visible text, otherwise the next selector is tried
+PROFILE_EXTRACT_JS = """
+const [bioSelectors, titleSelectors] = arguments;
+function first(selector) {
+  try {
+    if (selector.startsWith('//')) {
+      return document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    }
+    return document.querySelector(selector);
+  } catch (e) {
+    return null;
+  }
+}
+function firstText(selectors) {
+  for (const selector of selectors) {
+    const el = first(selector);
+    const text = el && (el.innerText || el.textContent || '').trim();
+    if (text) return text;
+  }
+  return null;
+}
+const hrefs = Array.from(document.querySelectorAll('a')).map(a => a.href).filter(Boolean);
+const textUrls = [];
+const snapshot = document.evaluate("//*[contains(text(), 'http')]", document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+for (let i = 0; i < snapshot.snapshotLength; i++) {
+  const text = snapshot.snapshotItem(i).innerText || '';
+  textUrls.push(...(text.match(/https?:\\/\\/[^\\s<>"]+/g) || []));
+}
+return {bio: firstText(bioSelectors), title: firstText(titleSelectors), hrefs: hrefs, text_urls: textUrls};
+"""
+
+
+def extract_profile_page(driver, bio_selectors=None, title_selectors=None):
+    """Return ``{bio, title, hrefs, text_urls}`` for the loaded profile page in one round trip"""
+    result = driver.execute_script(
+        PROFILE_EXTRACT_JS,
+        bio_selectors or BIO_SELECTORS,
+        title_selectors or TITLE_SELECTORS
+    ) or {}
+    return {
+        "bio": result.get("bio"),
+        "title": result.get("title"),
+        "hrefs": result.get("hrefs") or [],
+        "text_urls": result.get("text_urls") or [],
+    }
@@ -0,0 +1,209 @@
+# Process-wide per-host token buckets that pace every Luma page load and HTTP fetch
+
+from urllib.parse import urlparse
+import json
+import os
+import threading
+import time
+from selenium.common.exceptions import TimeoutException
+from metrics import RATE_LIMIT_BACKOFFS, RATE_LIMIT_WAIT_SECONDS
+
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "3"))  # Sustained requests per second per host
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "5"))  # Requests allowed back to back after an idle spell
+RATE_LIMIT_MIN_RPS = float(os.getenv("RATE_LIMIT_MIN_RPS", "0.2"))  # Floor the rate backs off to
+RATE_LIMIT_COOLDOWN = float(os.getenv("RATE_LIMIT_COOLDOWN", "30"))  # Seconds to pause a host after a 429/challenge
+RATE_LIMIT_HOSTS = os.getenv("RATE_LIMIT_HOSTS", "{}")  # Per-host overrides (JSON), e.g. {"api.lu.ma": 5}
+
+BACKOFF_FACTOR = 0.5  # Rate multiplier on each throttling signal
+RECOVERY_STEPS = 20  # Successful requests needed to climb from the floor back to the configured rate
+
+# Bot-protection interstitials (Cloudflare and friends) served instead of the real page
+CHALLENGE_MARKERS = ("just a moment", "attention required", "cf-chl", "challenge-platform", "verify you are human")
+
+
+class ChallengePageError(RuntimeError):
+    """Luma served a bot-protection challenge instead of the requested page"""
+
+
+def parse_host_rates(value):
+    """Per-host rates from a JSON object (or dict); invalid JSON and rates <= 0 are ignored with a warning"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value or "{}")
+        except ValueError as e:
+            print(f"⚠️ Ignoring invalid RATE_LIMIT_HOSTS ({e}); using the default rate for every host")
+            return {}
+    if not isinstance(value, dict):
+        print("⚠️ Ignoring RATE_LIMIT_HOSTS: expected a JSON object of host -> requests per second")
+        return {}
+    rates = {}
+    for host, rate in value.items():
+        try:
+            rate = float(rate)
+        except (TypeError, ValueError):
+            rate = 0.0
+        if rate > 0:
+            rates[host.lower()] = rate
+        else:
+            print(f"⚠️ Ignoring rate {value[host]!r} for {host} in RATE_LIMIT_HOSTS: must be > 0")
+    return rates
+
+
+HOST_RATES = parse_host_rates(RATE_LIMIT_HOSTS)
+
+
+def host_of(url):
+    return (urlparse(url or "").hostname or "").lower()
+
+
+def is_challenge_page(text):
+    """True if a page title or body looks like a bot-protection challenge"""
+    text = (text or "")[:20000].lower()
+    return any(marker in text for marker in CHALLENGE_MARKERS)
+
+
+class _Bucket:
+    def __init__(self, rate, burst):
+        self.target = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.requests = 0
+        self.waited = 0.0
+        self.backoffs = 0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token; returns how long the caller must wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            if now > self.updated:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+            self.tokens -= 1
+            self.requests += 1
+            # Tokens only refill from the end of a pause, so `updated` may lie in the future
+            wait = max(0.0, self.updated - now) + max(0.0, -self.tokens) / self.rate
+            self.waited += wait
+            return wait
+
+
+class HostRateLimiter:
+    """Token bucket per host shared by every job, driver and HTTP client.
+
+    ``acquire(url)`` blocks until the host has capacity. Callers report what
+    came back: a 429, a challenge page or a timeout halves that host's rate
+    (down to ``min_rate``) and pauses it for ``Retry-After`` or ``cooldown``
+    seconds; every success climbs back toward the configured rate, so the
+    scraper settles just under whatever Luma tolerates.
+    """
+
+    def __init__(self, rate=RATE_LIMIT_RPS, burst=RATE_LIMIT_BURST, min_rate=RATE_LIMIT_MIN_RPS,
+                 cooldown=RATE_LIMIT_COOLDOWN, host_rates=None):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min(min_rate, rate)
+        self.cooldown = cooldown
+        self.host_rates = HOST_RATES if host_rates is None else parse_host_rates(host_rates)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = _Bucket(self.host_rates.get(host, self.rate), self.burst)
+            return bucket
+
+    def acquire(self, url):
+        """Wait for a request slot on the URL's host; returns the seconds waited"""
+        host = host_of(url)
+        if not host or self.rate <= 0:
+            return 0.0
+        wait = self._bucket(host).reserve()
+        RATE_LIMIT_WAIT_SECONDS.observe(wait, host=host)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def report_success(self, url):
+        bucket = self._bucket(host_of(url))
+        with bucket.lock:
+            if bucket.rate < bucket.target:
+                step = (bucket.target - self.min_rate) / RECOVERY_STEPS
+                bucket.rate = min(bucket.target, bucket.rate + max(step, 0.01))
+
+    def report_throttled(self, url, reason, retry_after=None):
+        """Back off a host after a 429 ("throttled"), "challenge" page or "timeout"."""
+        host = host_of(url)
+        bucket = self._bucket(host)
+        pause = retry_after if retry_after is not None else self.cooldown
+        if reason == "timeout":
+            pause = 0  # Slow rather than refused: just lower the rate
+        with bucket.lock:
+            bucket.rate = max(self.min_rate, bucket.rate * BACKOFF_FACTOR)
+            bucket.tokens = min(bucket.tokens, 0.0)
+            bucket.updated = max(bucket.updated, time.monotonic() + pause)
+            bucket.backoffs += 1
+            rate = bucket.rate
+        RATE_LIMIT_BACKOFFS.inc(host=host, reason=reason)
+        print(f"🐢 Backing off {host} ({reason}): {rate:.2f} req/s"
+              + (f", paused {pause:g}s" if pause else ""))
+
+    def report_response(self, res):
+        """Classify a ``requests`` response; returns False if it was a 429 or challenge page"""
+        url = res.request.url if res.request is not None else res.url
+        return self.report_status(url, res.status_code, lambda: res.text, res.headers.get("Retry-After"))
+
+    def report_status(self, url, status_code, body=None, retry_after=None):
+        """Classify a response by status; ``body`` is the text (or a callable returning it) for challenge checks"""
+        if status_code == 429:
+            self.report_throttled(url, "throttled", _retry_after(retry_after))
+            return False
+        if status_code in (403, 503) and is_challenge_page(body() if callable(body) else body):
+            self.report_throttled(url, "challenge", _retry_after(retry_after))
+            return False
+        self.report_success(url)
+        return True
+
+    def navigate(self, driver, url):
+        """Rate-limited ``driver.get``; timeouts and challenge pages back off the host and raise"""
+        self.acquire(url)
+        try:
+            driver.get(url)
+        except TimeoutException:
+            self.report_throttled(url, "timeout")
+            raise
+        try:
+            title = driver.title
+        except Exception:
+            return
+        if is_challenge_page(title):
+            self.report_throttled(url, "challenge")
+            raise ChallengePageError(f"Challenge page instead of {url}")
+        self.report_success(url)
+
+    def stats(self):
+        with self._lock:
+            buckets = dict(self._buckets)
+        hosts = {}
+        for host, bucket in buckets.items():
+            with bucket.lock:
+                hosts[host] = {
+                    "rate": round(bucket.rate, 3),
+                    "target_rate": bucket.target,
+                    "requests": bucket.requests,
+                    "waited_seconds": round(bucket.waited, 1),
+                    "backoffs": bucket.backoffs,
+                    "paused_for": round(max(0.0, bucket.updated - time.monotonic()), 1),
+                }
+        return {"rate": self.rate, "burst": self.burst, "min_rate": self.min_rate, "hosts": hosts}
+
+
+def _retry_after(value):
+    """Seconds from a Retry-After header (HTTP-date values fall back to the default cooldown)"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
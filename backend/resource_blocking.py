@@ -0,0 +1,98 @@
+# Keeps scraper Chrome from downloading assets we never read (images, fonts, media, trackers)
+
+import json
+import os
+import re
+
+# "off", "assets" (images, fonts, media) or "strict" (assets + analytics/tracking scripts)
+RESOURCE_BLOCKING = os.getenv("RESOURCE_BLOCKING", "strict")
+
+IMAGE_EXTENSIONS = ["png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"]
+FONT_EXTENSIONS = ["woff", "woff2", "ttf", "otf", "eot"]
+MEDIA_EXTENSIONS = ["mp4", "webm", "mov", "m4v", "mp3", "m4a", "ogg", "wav", "m3u8"]
+FONT_HOSTS = ["fonts.googleapis.com", "fonts.gstatic.com", "use.typekit.net"]
+TRACKER_HOSTS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "connect.facebook.net",
+    "segment.io", "segment.com", "sentry.io", "sentry-cdn.com", "hotjar.com", "intercom.io",
+    "intercomcdn.com", "posthog.com", "mixpanel.com", "amplitude.com", "clarity.ms",
+    "fullstory.com", "heapanalytics.com", "js.hs-scripts.com", "plausible.io",
+]
+
+
+def _list_from_env(name, default):
+    raw = os.getenv(name)
+    if not raw:
+        return default
+    try:
+        values = json.loads(raw)
+    except ValueError:
+        print(f"⚠️ Ignoring {name}: not a JSON list")
+        return default
+    return [v for v in values if isinstance(v, str)]
+
+
+# Hosts whose requests are never blocked (the guest-list and user APIs live here)
+RESOURCE_ALLOWLIST = _list_from_env("RESOURCE_ALLOWLIST", ["lu.ma", "api.lu.ma", "luma.com", "api.luma.com"])
+# Extra Network.setBlockedURLs patterns ("*" wildcards), e.g. '["*intercom*"]'
+RESOURCE_BLOCK_EXTRA = _list_from_env("RESOURCE_BLOCK_EXTRA", [])
+
+# Sample requests to the allowlisted hosts a block pattern must not match
+_ALLOWLIST_PROBES = ["https://{}/", "https://{}/event/get-guest-list?event_api_id=evt-1",
+                     "https://{}/user/usr-1", "https://{}/url?url=/user/usr-1"]
+
+
+def _extension_patterns(extensions):
+    # Matches the extension at the end of the path or before a query string
+    return [p for ext in extensions for p in (f"*.{ext}", f"*.{ext}?*")]
+
+
+def _pattern_regex(pattern):
+    return re.compile("^" + ".*".join(re.escape(part) for part in pattern.split("*")) + "$", re.I)
+
+
+def _blocks_allowlisted(pattern):
+    regex = _pattern_regex(pattern)
+    return any(regex.match(probe.format(host)) for host in RESOURCE_ALLOWLIST for probe in _ALLOWLIST_PROBES)
+
+
+def blocked_url_patterns(level=RESOURCE_BLOCKING):
+    """``Network.setBlockedURLs`` patterns for a blocking level, minus any that hit the allowlist"""
+    if level == "off":
+        return []
+    patterns = _extension_patterns(IMAGE_EXTENSIONS + FONT_EXTENSIONS + MEDIA_EXTENSIONS)
+    patterns += [f"*://{host}/*" for host in FONT_HOSTS]
+    if level == "strict":
+        patterns += [f"*://{host}/*" for host in TRACKER_HOSTS]
+        patterns += [f"*://*.{host}/*" for host in TRACKER_HOSTS]
+    patterns += RESOURCE_BLOCK_EXTRA
+    return [p for p in patterns if not _blocks_allowlisted(p)]
+
+
+def apply_to_options(options, level=RESOURCE_BLOCKING):
+    """Chrome preferences that stop images from being fetched or decoded at all"""
+    if level == "off":
+        return options
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+    })
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--mute-audio")
+    return options
+
+
+def enable_blocking(driver, level=RESOURCE_BLOCKING):
+    """Block fonts, media, leftover image requests and trackers for this driver's tab.
+
+    The block list lives on the DevTools session, so it survives navigations
+    in the same tab. Returns the number of patterns installed.
+    """
+    patterns = blocked_url_patterns(level)
+    if not patterns:
+        return 0
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        print(f"⚠️ Could not enable resource blocking: {e}")
+        return 0
+    return len(patterns)
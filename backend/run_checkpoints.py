@@ -0,0 +1,241 @@
+# Durable progress of scrape runs (guest list, then each enriched profile) so crashed runs can resume
+
+from event_snapshots import guest_key
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class CheckpointStore:
+    """SQLite record of every scrape run's guest list and scraped profiles.
+
+    A run is ``running`` until it is marked ``complete``, ``failed`` or
+    ``partial`` (profiles skipped at a deadline; resumable like failed runs).
+    Runs left ``running`` by a process that no longer exists (crash or
+    restart) are marked ``interrupted`` when a store is opened, and can be
+    resumed whenever their owner has died since; the API and the CLI can
+    share one file. Guest and profile rows are written as the
+    scrape goes, so a resumed run only redoes what was never stored.
+    """
+
+    def __init__(self, path="scrape_runs.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._active = set()  # Runs this process is working on; our pid alone could be a previous incarnation's
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")  # One small commit per profile
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY,"
+            " event_url TEXT NOT NULL,"
+            " params TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " guest_list_complete INTEGER NOT NULL DEFAULT 0,"
+            " attempts INTEGER NOT NULL DEFAULT 1,"
+            " pid INTEGER,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS run_guests ("
+            " run_id TEXT NOT NULL,"
+            " idx INTEGER NOT NULL,"
+            " contact TEXT NOT NULL,"
+            " profile TEXT,"
+            " PRIMARY KEY (run_id, idx))"
+        )
+        stale = [(run_id,) for run_id, pid in self._db.execute("SELECT run_id, pid FROM runs WHERE status = 'running'")
+                 if not self._owner_alive(run_id, pid)]
+        self._db.executemany("UPDATE runs SET status = 'interrupted' WHERE run_id = ?", stale)
+        self._db.commit()
+
+    def start(self, event_url, params, run_id=None):
+        """Begin a new run; returns its ``RunCheckpoint``"""
+        run_id = run_id or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT INTO runs (run_id, event_url, params, status, pid, created_at, updated_at)"
+                             " VALUES (?, ?, ?, 'running', ?, ?, ?)",
+                             (run_id, event_url, json.dumps(params), os.getpid(), now, now))
+            self._db.commit()
+            self._active.add(run_id)
+        return RunCheckpoint(self, run_id, event_url, params)
+
+    def check_resumable(self, run_id):
+        """Raise KeyError for unknown runs and ValueError for runs ``resume`` would refuse"""
+        with self._lock:
+            self._resumable_row(run_id)
+
+    def resume(self, run_id):
+        """Reopen an unfinished run with its stored guests and profiles.
+
+        Raises KeyError for unknown runs and ValueError for completed runs or
+        runs a live process (this one included) is still working on. The run
+        is claimed with a conditional update, so of two concurrent resumes
+        only one succeeds.
+        """
+        with self._lock:
+            row = self._resumable_row(run_id)
+            claimed = self._db.execute(
+                "UPDATE runs SET status = 'running', attempts = attempts + 1, error = NULL, pid = ?,"
+                " updated_at = ? WHERE run_id = ? AND status = ? AND pid IS ?",
+                (os.getpid(), time.time(), run_id, row[2], row[4])
+            ).rowcount
+            self._db.commit()
+            if not claimed:  # Another process resumed it between our read and write
+                raise ValueError(f"Run {run_id} was resumed concurrently")
+            self._active.add(run_id)
+            guests = self._db.execute(
+                "SELECT idx, contact, profile FROM run_guests WHERE run_id = ? ORDER BY idx", (run_id,)
+            ).fetchall()
+        run = RunCheckpoint(self, run_id, row[0], json.loads(row[1]))
+        run.load([(idx, json.loads(contact), json.loads(profile) if profile is not None else None)
+                  for idx, contact, profile in guests], bool(row[3]))
+        return run
+
+    def _resumable_row(self, run_id):
+        row = self._db.execute(
+            "SELECT event_url, params, status, guest_list_complete, pid FROM runs WHERE run_id = ?", (run_id,)
+        ).fetchone()
+        if not row:
+            raise KeyError(f"Unknown run {run_id}")
+        if row[2] == "complete":
+            raise ValueError(f"Run {run_id} already completed")
+        if row[2] == "running" and self._owner_alive(run_id, row[4]):
+            raise ValueError(f"Run {run_id} is still running (pid {row[4]})")
+        return row
+
+    def _owner_alive(self, run_id, pid):
+        if pid == os.getpid():
+            return run_id in self._active
+        return _process_alive(pid)
+
+    def get(self, run_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT run_id, event_url, status, guest_list_complete, attempts, error, created_at, updated_at,"
+                " (SELECT COUNT(*) FROM run_guests g WHERE g.run_id = runs.run_id),"
+                " (SELECT COUNT(*) FROM run_guests g WHERE g.run_id = runs.run_id AND g.profile IS NOT NULL)"
+                " FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        return self._summary(row) if row else None
+
+    def list_runs(self, status=None, limit=50):
+        """Most recent runs first, optionally only those with ``status``"""
+        query = "SELECT run_id FROM runs" + (" WHERE status = ?" if status else "") + \
+                " ORDER BY updated_at DESC LIMIT ?"
+        with self._lock:
+            run_ids = [r[0] for r in self._db.execute(query, (status, limit) if status else (limit,))]
+        return [self.get(run_id) for run_id in run_ids]
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM runs GROUP BY status").fetchall())
+        return {"runs": counts}
+
+    def _write(self, sql, args):
+        with self._lock:
+            self._db.execute(sql, args)
+            self._db.commit()
+
+    def _release(self, run_id, sql, args):
+        with self._lock:
+            self._db.execute(sql, args)
+            self._db.commit()
+            self._active.discard(run_id)
+
+    @staticmethod
+    def _summary(row):
+        def fmt(ts):
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+        return {
+            "run_id": row[0],
+            "event_url": row[1],
+            "status": row[2],
+            "guest_list_complete": bool(row[3]),
+            "attempts": row[4],
+            "error": row[5],
+            "created_at": fmt(row[6]),
+            "updated_at": fmt(row[7]),
+            "guests": row[8],
+            "profiles_done": row[9],
+        }
+
+
+class RunCheckpoint:
+    """Progress writer for one run.
+
+    ``record_guests`` wraps the guest stream and stores each guest as it
+    passes; ``save_profile`` stores each final profile. On a resumed run,
+    ``guests`` holds the stored guest list (complete if
+    ``guest_list_complete``) and ``done_profile`` returns the profiles that
+    were already scraped, matched by guest identity rather than position.
+    """
+
+    def __init__(self, store, run_id, event_url, params):
+        self.store = store
+        self.run_id = run_id
+        self.event_url = event_url
+        self.params = params
+        self.guests = []
+        self.guest_list_complete = False
+        self._done = {}  # guest key -> profile dict
+
+    def load(self, rows, guest_list_complete):
+        self.guests = [contact for _, contact, _ in rows]
+        self.guest_list_complete = guest_list_complete
+        self._done = {guest_key(contact): profile for _, contact, profile in rows if profile}
+        print(f"⏩ Resuming run {self.run_id}: {len(self.guests)} guests stored"
+              f"{'' if guest_list_complete else ' (guest list incomplete)'}, {len(self._done)} profiles done")
+
+    @property
+    def resumed(self):
+        return bool(self.guests)
+
+    def record_guests(self, guests):
+        """Pass a guest stream through, storing each guest and marking the list complete at the end.
+
+        Re-reading the list on a resumed run replaces the stored rows; profiles
+        done earlier are written back by ``save_profile`` as they are reused.
+        """
+        count = 0
+        for idx, contact in enumerate(guests):
+            self.store._write("INSERT OR REPLACE INTO run_guests (run_id, idx, contact, profile) VALUES (?, ?, ?, NULL)",
+                              (self.run_id, idx, json.dumps(contact)))
+            count = idx + 1
+            yield contact
+        self.guest_list_complete = True
+        self.store._write("DELETE FROM run_guests WHERE run_id = ? AND idx >= ?", (self.run_id, count))
+        self.store._write("UPDATE runs SET guest_list_complete = 1, updated_at = ? WHERE run_id = ?",
+                          (time.time(), self.run_id))
+
+    def done_profile(self, contact):
+        """Profile stored for this guest by an earlier attempt, or None"""
+        profile = self._done.get(guest_key(contact))
+        return dict(profile) if profile else None
+
+    def save_profile(self, idx, profile):
+        self.store._write("UPDATE run_guests SET profile = ? WHERE run_id = ? AND idx = ?",
+                          (json.dumps(profile or {}), self.run_id, idx))
+
+    def finish(self, error=None, partial=False):
+        status = "failed" if error else "partial" if partial else "complete"
+        self.store._release(self.run_id, "UPDATE runs SET status = ?, error = ?, updated_at = ? WHERE run_id = ?",
+                            (status, str(error) if error else None, time.time(), self.run_id))
+
+
+def _process_alive(pid):
+    """Whether a process with this pid exists"""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -1,25 +1,107 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import json
 import time
-import requests
 import os
-import re
-from urllib.parse import urljoin, urlparse
+import uuid
+import itertools
+import queue
+import threading
+from urllib.parse import urljoin
+from job_queue import JobQueue, QueueFullError
+from driver_pool import DriverPool
+from luma_session import LumaSession, SessionExpiredError, is_logged_out_url
+from profile_fetcher import ProfileFetchStage
+from guest_modal import iter_modal_guests
+from profile_cache import ProfileCache
+from event_cache import EventScrapeCache
+from event_snapshots import EventSnapshotStore, GuestListDiff
+from run_checkpoints import CheckpointStore
+from contact_store import ContactStore
+from intent_ranker import IntentRanker, priority, tokenize
+from webhook_delivery import BatchDelivery
+from webhook_outbox import WebhookOutbox
+from profile_page import extract_profile_page, BIO_SELECTORS, TITLE_SELECTORS
+from social_classifier import classify_links
+from concurrent.futures import ThreadPoolExecutor
+from http_profile import HttpProfileFetcher
+from guest_capture import capture_guest_list, flush_network_log
+from page_waits import wait_for_event_page, wait_for_profile
+from resource_blocking import RESOURCE_BLOCKING, RESOURCE_ALLOWLIST
+from rate_limiter import HostRateLimiter
+import metrics
+import atexit
 
 app = Flask(__name__)
 CORS(app)  # Allow frontend to call this API
 
 # Configuration
-N8N_WEBHOOK = "https://qrenaud.app.n8n.cloud/webhook/user"
+N8N_WEBHOOK = os.getenv("N8N_WEBHOOK_URL", "https://qrenaud.app.n8n.cloud/webhook/user")
 MAX_USERS = int(os.getenv("MAX_USERS", "20"))
+DEADLINE_MAX_USERS = int(os.getenv("DEADLINE_MAX_USERS", "500"))  # Guest-list cap when a request sets deadline_ms
 PROFILE_SCRAPING_ENABLED = True  # Set to False to disable profile visiting
+DELIVERY_MODE = os.getenv("DELIVERY_MODE", "single")  # "single" payload, or stream "batch" (JSON) / "ndjson"
+DELIVERY_BATCH_SIZE = int(os.getenv("DELIVERY_BATCH_SIZE", "10"))  # Contacts per streamed POST
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "webhook_outbox.db")
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))  # Attempts before a delivery is dead-lettered
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "2"))  # Seconds; doubles after each failure
+SCRAPE_WORKERS = int(os.getenv("SCRAPE_WORKERS", "2"))  # Max concurrent scrapes (and Chrome instances)
+MAX_QUEUED_JOBS = int(os.getenv("MAX_QUEUED_JOBS", "100"))
+GUEST_LIST_MODE = os.getenv("GUEST_LIST_MODE", "network")  # "network" (captured API responses, DOM fallback) or "dom"
+MODAL_SCROLL_WAIT = float(os.getenv("MODAL_SCROLL_WAIT", "2"))  # Max seconds to wait for new rows after a scroll
+PROFILE_FETCH_MODE = os.getenv("PROFILE_FETCH_MODE", "http")  # "http" (Chrome fallback) or "selenium"
+HTTP_PROFILE_CONCURRENCY = int(os.getenv("HTTP_PROFILE_CONCURRENCY", "8"))
+PROFILE_CACHE_PATH = os.getenv("PROFILE_CACHE_PATH", "profile_cache.db")
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", str(7 * 24 * 3600)))  # Seconds a cached profile stays fresh
+PROFILE_CACHE_MEMORY_SIZE = int(os.getenv("PROFILE_CACHE_MEMORY_SIZE", "1000"))  # In-memory LRU entries
+EVENT_CACHE_TTL = int(os.getenv("EVENT_CACHE_TTL", "300"))  # Seconds a finished event scrape is reused
+INCREMENTAL_SCRAPE = os.getenv("INCREMENTAL_SCRAPE", "1") == "1"  # Diff against the last guest-list snapshot
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "event_snapshots.db")
+DELIVERY_DELTA_ONLY = os.getenv("DELIVERY_DELTA_ONLY", "0") == "1"  # Send only new/changed guests to n8n
+RANK_TOP_K = int(os.getenv("RANK_TOP_K", "0"))  # Best-matching contacts sent to n8n (0 = all, ranked)
+PRIORITIZE_PROFILES = os.getenv("PRIORITIZE_PROFILES", "1") == "1"  # Visit intent-matching profiles first
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "scrape_runs.db")  # Per-run progress, for resuming failed runs
+CONTACT_STORE_PATH = os.getenv("CONTACT_STORE_PATH", "contacts.db")  # Every person scraped, across events
+PROFILE_CONCURRENCY = int(os.getenv("PROFILE_CONCURRENCY", "3"))  # Drivers visiting profiles per job
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", str(SCRAPE_WORKERS * PROFILE_CONCURRENCY)))
+DRIVER_MAX_USES = int(os.getenv("DRIVER_MAX_USES", "50"))  # Jobs served before a driver is recycled
+DRIVER_MAX_NAVIGATIONS = int(os.getenv("DRIVER_MAX_NAVIGATIONS", "200"))  # Page loads before a driver is swapped
+DRIVER_MAX_RSS_MB = int(os.getenv("DRIVER_MAX_RSS_MB", "1024"))  # Chrome memory (MB) before a driver is swapped
+DRIVER_ACQUIRE_TIMEOUT = int(os.getenv("DRIVER_ACQUIRE_TIMEOUT", "300"))  # Seconds to wait for a free driver
+
+rate_limiter = HostRateLimiter()  # One token bucket per host across every job, driver and HTTP client
+luma_session = LumaSession(rate_limiter=rate_limiter)  # Cookies loaded once, shared by every driver and HTTP client
+driver_pool = DriverPool(size=DRIVER_POOL_SIZE, max_uses=DRIVER_MAX_USES,
+                         capture_network=GUEST_LIST_MODE == "network", session=luma_session,
+                         max_navigations=DRIVER_MAX_NAVIGATIONS, max_rss_mb=DRIVER_MAX_RSS_MB)
+atexit.register(driver_pool.shutdown)
+webhook_outbox = WebhookOutbox(OUTBOX_PATH, max_attempts=OUTBOX_MAX_ATTEMPTS, backoff_base=OUTBOX_BACKOFF_BASE)
+event_cache = EventScrapeCache(ttl=EVENT_CACHE_TTL)
+profile_cache = ProfileCache(PROFILE_CACHE_PATH, ttl=PROFILE_CACHE_TTL, memory_size=PROFILE_CACHE_MEMORY_SIZE)
+event_snapshots = EventSnapshotStore(SNAPSHOT_PATH)
+run_checkpoints = CheckpointStore(CHECKPOINT_PATH)
+queued_resumes = set()  # Run ids with a resume job queued or running, so a second resume is refused
+queued_resumes_lock = threading.Lock()
+contact_store = ContactStore(CONTACT_STORE_PATH)
+intent_ranker = IntentRanker()
+
+def non_negative_int(data, key, default=0):
+    """Request field as an int >= 0 (``default`` when absent); raises ValueError otherwise"""
+    value = data.get(key)
+    if value is None:
+        return default
+    try:
+        if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            raise ValueError
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{key} must be a non-negative integer") from None
+    if number < 0:
+        raise ValueError(f"{key} must be a non-negative integer")
+    return number
 
 @app.route('/scrape', methods=['POST'])
 def scrape_and_process():
@@ -31,234 +113,511 @@ def scrape_and_process():
         
         if not event_url:
             return jsonify({"error": "Missing event_url"}), 400
+        try:
+            top_k = non_negative_int(data, "top_k", RANK_TOP_K)
+            deadline_ms = non_negative_int(data, "deadline_ms")
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
             
-        print(f"🔍 Scraping event: {event_url}")
+        print(f"🔍 Queueing event: {event_url}")
         print(f"👤 User looking for: {user_intent}")
         
-        # Scrape the event with enhanced profile data
-        contacts = scrape_luma_event(event_url)
-        
-        # Send to n8n webhook
-        n8n_payload = {
+        job = job_queue.submit({
+            "run_id": uuid.uuid4().hex,  # Checkpoint id; POST /runs/<run_id>/resume if the job fails
             "event_url": event_url,
             "user_intent": user_intent,
             "callback_url": callback_url,
-            "contacts": contacts,
-            "total_found": len(contacts),
-            "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        send_to_n8n(n8n_payload)
+            "force_refresh": bool(data.get("force_refresh", False)),  # Bypass the profile cache
+            "delta_only": bool(data.get("delta_only", DELIVERY_DELTA_ONLY)),  # Only new/changed guests to n8n
+            "top_k": top_k,  # Only the best-matching contacts to n8n
+            "deadline_ms": deadline_ms,  # Time budget; profiles not visited by then are skipped
+            # Counted from now, so time spent queued is part of the budget
+            "deadline": time.monotonic() + deadline_ms / 1000 if deadline_ms else None
+        })
         
         return jsonify({
-            "status": "success", 
-            "message": f"Scraped {len(contacts)} contacts with enhanced profile data and sent to n8n",
-            "contacts_found": len(contacts),
-            "enhanced_profiles": sum(1 for c in contacts if c.get("profile_scraped", False))
-        }), 200
+            "status": "queued",
+            "message": "Scrape job queued",
+            "job_id": job["job_id"],
+            "run_id": job["params"]["run_id"],
+            "status_url": f"/jobs/{job['job_id']}"
+        }), 202
         
+    except QueueFullError as e:
+        print(f"❌ {e}")
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         print(f"❌ Error in scrape_and_process: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-def scrape_luma_event(event_url):
-    """Scrape Luma event and return list of contacts with enhanced profile data"""
-    contacts = []
+@app.route('/runs', methods=['GET'])
+def list_runs():
+    """Checkpointed runs, newest first; ?status=failed or ?status=interrupted lists resumable ones"""
+    return jsonify({"runs": run_checkpoints.list_runs(request.args.get("status"))}), 200
+
+@app.route('/runs/<run_id>', methods=['GET'])
+def get_run(run_id):
+    run = run_checkpoints.get(run_id)
+    if not run:
+        return jsonify({"error": "Unknown run_id"}), 404
+    return jsonify(run), 200
+
+@app.route('/runs/<run_id>/resume', methods=['POST'])
+def resume_run(run_id):
+    """Queue a job that continues a failed or interrupted run from its checkpoint"""
+    run = run_checkpoints.get(run_id)
+    if not run:
+        return jsonify({"error": "Unknown run_id"}), 404
+    with queued_resumes_lock:
+        if run_id in queued_resumes:
+            return jsonify({"error": "Run is queued for resume"}), 409
+        try:
+            run_checkpoints.check_resumable(run_id)  # A "running" run whose process died can be resumed
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 409
+        queued_resumes.add(run_id)
+    try:
+        job = job_queue.submit({"run_id": run_id, "resume": True, "event_url": run["event_url"],
+                                "accepted_at": time.monotonic()})
+    except QueueFullError as e:
+        with queued_resumes_lock:
+            queued_resumes.discard(run_id)
+        return jsonify({"error": str(e)}), 503
+    print(f"⏩ Queued resume of run {run_id} ({run['profiles_done']}/{run['guests']} profiles done)")
+    return jsonify({
+        "status": "queued",
+        "message": "Resume job queued",
+        "job_id": job["job_id"],
+        "run_id": run_id,
+        "status_url": f"/jobs/{job['job_id']}"
+    }), 202
+
+@app.route('/contacts', methods=['GET'])
+def query_contacts():
+    """People from every scraped event, e.g. ?q=founder&days=30 or ?event_url=...&limit=100"""
+    try:
+        days = non_negative_int(request.args, "days", None)
+        limit = max(1, min(non_negative_int(request.args, "limit", 50), 1000))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if days == 0:
+        return jsonify({"error": "days must be at least 1"}), 400
+    people = contact_store.query(text=request.args.get("q"), event_url=request.args.get("event_url"),
+                                 seen_within_days=days, limit=limit)
+    return jsonify({"count": len(people), "contacts": people}), 200
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Unknown job_id"}), 404
+    return jsonify(job), 200
+
+def run_scrape_job(params):
+    """Worker entry point: scrape the event and forward contacts to n8n"""
+    webhook_outbox.start()  # Idempotent; also started at boot to resume pending deliveries
+    if params.get("resume"):
+        accepted_at = params["accepted_at"]
+        try:
+            run = run_checkpoints.resume(params["run_id"])
+        finally:
+            with queued_resumes_lock:
+                queued_resumes.discard(params["run_id"])  # Claimed (now "running") or refused
+        params = {**run.params, "run_id": run.run_id}  # The original request's options
+        if params.get("deadline_ms"):
+            params["deadline"] = accepted_at + params["deadline_ms"] / 1000  # A fresh budget for the resume
+    else:
+        run = run_checkpoints.start(params["event_url"], params, run_id=params.get("run_id"))
+    try:
+        result = scrape_event_run(params, run)
+    except Exception as e:
+        run.finish(error=e)
+        raise
+    run.finish(partial=result.get("deadline", {}).get("partial", False))
+    return result
+
+def scrape_event_run(params, run):
+    """Scrape one checkpointed run and deliver its contacts"""
+    event_url = params["event_url"]
+    print(f"🔍 Scraping event: {event_url}")
     
-    # Setup browser
-    options = Options()
-    options.add_argument("--headless")  # Run in headless mode for deployment
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--user-data-dir=/tmp/chrome-user-data")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option('useAutomationExtension', False)
+    base_payload = {
+        "event_url": event_url,
+        "user_intent": params.get("user_intent", ""),
+        "callback_url": params.get("callback_url")
+    }
+    if run.resumed:
+        base_payload["resumed_run_id"] = run.run_id
     
-    driver = webdriver.Chrome(options=options)
-    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    # In batch/ndjson mode contacts are posted to n8n as soon as they are enriched
+    delivery = None
+    if DELIVERY_MODE in ("batch", "ndjson"):
+        # A resumed run restarts its batch sequence, so it streams under a fresh delivery run_id
+        delivery = BatchDelivery(webhook_outbox, N8N_WEBHOOK, base_payload, batch_size=DELIVERY_BATCH_SIZE,
+                                 fmt="ndjson" if DELIVERY_MODE == "ndjson" else "json",
+                                 run_id=None if run.resumed else run.run_id)
     
+    # With delta_only, guests unchanged since the last snapshot are not sent again
+    delta_only = INCREMENTAL_SCRAPE and params.get("delta_only", DELIVERY_DELTA_ONLY)
+    def is_delta(contact):
+        return not delta_only or contact.get("guest_status") != "unchanged"
+
+    def deliver(idx, contact):
+        if is_delta(contact):
+            delivery.add(idx, contact)
+    
+    # Scrape the event with enhanced profile data, sharing concurrent or recent scrapes
+    force_refresh = params.get("force_refresh", False)
+    deadline_ms = params.get("deadline_ms") or 0
+    deadline = params.get("deadline")
+    def scrape():
+        return scrape_luma_event(event_url, force_refresh=force_refresh, on_contact=deliver if delivery else None,
+                                 run=run, intent=params.get("user_intent", ""), deadline=deadline)
     try:
-        # Login via cookies
-        driver.get("https://lu.ma/")
-        time.sleep(3)
-
-        with open("cookies.json", "r") as f:
-            cookies = json.load(f)
-
-        for cookie in cookies:
-            for k in ["sameSite", "storeId", "hostOnly", "session"]:
-                cookie.pop(k, None)
-            driver.add_cookie(cookie)
-
-        # Visit event page
-        driver.get(event_url)
-        print(f"📄 Page title after login: {driver.title}")
-        time.sleep(5)
-
-        # Open guest list modal
-        wait = WebDriverWait(driver, 10)
-        try:
-            guest_trigger = wait.until(EC.element_to_be_clickable((By.XPATH, "//div[contains(text(), 'others')]")))
-            guest_trigger.click()
-        except TimeoutException:
-            print("⚠️ Could not find guest list trigger, trying alternative selectors...")
-            # Try alternative selectors for guest list
-            guest_triggers = [
-                "//div[contains(text(), 'guest')]",
-                "//div[contains(text(), 'attendee')]",
-                "//button[contains(text(), 'guest')]"
-            ]
-            for selector in guest_triggers:
-                try:
-                    guest_trigger = driver.find_element(By.XPATH, selector)
-                    guest_trigger.click()
-                    break
-                except:
-                    continue
-
-        modal = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "lux-modal-body"))
-        )
-
-        # Scroll to load all guests
-        print("📜 Loading all guests...")
-        for i in range(8):
-            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight", modal)
-            time.sleep(1)
-            print(f"   Scroll {i+1}/8")
-
-        # Scrape guests from modal
-        guest_blocks = driver.find_elements(By.XPATH, "//div[contains(@class, 'gap-2 spread')]")
-        print(f"👥 Found {len(guest_blocks)} guests in modal")
-
-        for idx, guest in enumerate(guest_blocks):
-            if idx >= MAX_USERS:
-                print(f"🚫 Reached max users limit ({MAX_USERS})")
-                break
-
-            try:
-                name = guest.find_element(By.CLASS_NAME, "name").text.strip()
-            except:
-                name = "Unknown"
-
-            try:
-                profile_elem = guest.find_element(By.XPATH, ".//a[contains(@href, '/user/')]")
-                profile_url = profile_elem.get_attribute("href")
-                if profile_url.startswith("/user/"):
-                    profile_url = "https://lu.ma" + profile_url
-            except:
-                profile_url = None
-
-            print(f"👤 Processing {idx+1}/{min(len(guest_blocks), MAX_USERS)}: {name}")
-
-            # Extract basic social links from modal
-            raw_links = [l.get_attribute("href") for l in guest.find_elements(By.TAG_NAME, "a")]
-            cleaned_links = list(set(raw_links))
-            modal_socials = extract_socials(cleaned_links)
-
-            contact = {
-                "name": name,
-                "profile_url": profile_url,
-                "profile_scraped": False,
-                **modal_socials
-            }
-
-            # Enhanced: Visit user profile for comprehensive social links
-            if PROFILE_SCRAPING_ENABLED and profile_url:
-                profile_data = scrape_user_profile(driver, profile_url)
-                if profile_data:
-                    contact.update(profile_data)
-                    contact["profile_scraped"] = True
+        if deadline:
+            # A time-boxed scrape may be partial: never share it, and never wait on someone else's
+            contacts, source = scrape(), "scrape"
+        else:
+            contacts, source = event_cache.get_or_scrape(event_url, scrape, force_refresh=force_refresh)
+    except Exception as e:
+        if delivery:
+            delivery.abort(e)
+        raise
+    if source != "scrape":
+        print(f"♻️ Reusing {source} scrape of {event_url} ({len(contacts)} contacts)")
+    else:
+        contact_store.record_event(event_url, contacts)
+    diff = event_snapshots.last_diff(event_url) if INCREMENTAL_SCRAPE else None
+    # Diff and deadline summaries go to n8n and into the job result alike
+    summary_fields = {"diff": diff} if diff else {}
+    if deadline:
+        skipped = sum(1 for c in contacts if c.get("deadline_skipped"))
+        summary_fields["deadline"] = {"deadline_ms": deadline_ms, "partial": skipped > 0, "profiles_skipped": skipped}
+        print(f"⏱️ Deadline of {deadline_ms} ms: {skipped} profile visits skipped")
+    
+    # Rank against the intent with BM25 over this event's attendees, then keep the top K
+    top_k = params.get("top_k", RANK_TOP_K)
+    ranked = intent_ranker.rank([{**c, "index": idx} for idx, c in enumerate(contacts)],
+                                params.get("user_intent", ""))
+    delta = [c for c in ranked if is_delta(c)]
+    selected = delta[:top_k] if top_k else delta
+    
+    message_id = None
+    if delivery:
+        if source != "scrape":
+            # Nothing was streamed for a shared or cached scrape; send it in batches now
+            for idx, contact in enumerate(contacts):
+                deliver(idx, contact)
+        # Contacts were streamed before they could be ranked; the marker says which ones matter
+        top_matches = [{"index": c["index"], "name": c["name"], "match_score": c["match_score"]}
+                       for c in selected if c["match_score"] > 0]
+        delivery.complete(len(contacts), top_matches=top_matches, **summary_fields)
+        selected = delta
+    elif delta_only and not delta and not (diff and diff["removed"]):
+        print(f"💤 No guest-list changes for {event_url}; nothing sent to n8n")
+    else:
+        # Send to n8n webhook
+        n8n_payload = {
+            **base_payload,
+            "contacts": selected,
+            "total_found": len(contacts),
+            "delta_only": bool(delta_only),
+            "top_k": top_k,
+            **summary_fields,
+            "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        
+        message_id = send_to_n8n(n8n_payload)
+    
+    result = {
+        "message": f"Scraped {len(contacts)} contacts with enhanced profile data and queued "
+                   f"{len(selected)} of them for n8n",
+        "contacts_found": len(contacts),
+        "contacts_sent": len(selected),
+        "enhanced_profiles": sum(1 for c in contacts if c.get("profile_scraped", False)),
+        "scrape_source": source,
+        "run_id": run.run_id,
+        "resumed": run.resumed,
+        **summary_fields,
+        "contacts": ranked  # Best match first, each with match_score and match_terms
+    }
+    if delivery:
+        stats = delivery.stats()
+        result.update(stats, run_id=run.run_id)
+        if stats["run_id"] != run.run_id:
+            result["delivery_run_id"] = stats["run_id"]
+    else:
+        result["outbox_message_id"] = message_id
+    return result
+
+http_fetcher = HttpProfileFetcher(lambda links: extract_enhanced_socials(links), luma_session=luma_session,
+                                  pool_size=HTTP_PROFILE_CONCURRENCY, rate_limiter=rate_limiter)
+job_queue = JobQueue(run_scrape_job, num_workers=SCRAPE_WORKERS, max_queued=MAX_QUEUED_JOBS)
+
+def scrape_luma_event(event_url, force_refresh=False, on_contact=None, run=None, intent="", deadline=None):
+    """Scrape a Luma event and return its contacts with enhanced profile data"""
+    contacts = []
+    max_users = DEADLINE_MAX_USERS if deadline else MAX_USERS
+    luma_session.ensure_valid()  # Fail loudly instead of scraping an empty guest list
+    
+    # Check out a warm, already logged-in browser from the pool
+    timeout = DRIVER_ACQUIRE_TIMEOUT if deadline is None else \
+        max(0, min(DRIVER_ACQUIRE_TIMEOUT, deadline - time.monotonic()))  # Never wait past the deadline
+    with driver_pool.driver(timeout=timeout) as driver:
+        if run and run.guest_list_complete:
+            guests = iter(run.guests)
+        else:
+            guests = open_guest_list(driver, event_url, max_users)
+            if run:
+                guests = run.record_guests(guests)
+
+        # Enhanced: Profile visits start as guests stream in from the list loader.
+        # Guests unchanged since the last snapshot reuse their profile instead of a visit.
+        diff = GuestListDiff(event_snapshots, event_url, reuse_profiles=not force_refresh,
+                             max_age=PROFILE_CACHE_TTL) if INCREMENTAL_SCRAPE else None
+        basic_contacts, profile_results = scrape_profiles(driver, guests, force_refresh, on_contact, diff, run,
+                                                          intent_terms=tokenize(intent) if PRIORITIZE_PROFILES else (),
+                                                          deadline=deadline)
+        if diff:
+            diff.commit(basic_contacts, profile_results, truncated=len(basic_contacts) >= max_users)
+
+        for idx, (basic_contact, profile_data) in enumerate(zip(basic_contacts, profile_results)):
+            print(f"👤 Processing {idx+1}/{len(basic_contacts)}: {basic_contact['name']}")
+
+            contact = build_contact(basic_contact, profile_data)
+            if PROFILE_SCRAPING_ENABLED and basic_contact["profile_url"]:
+                if contact["profile_scraped"]:
                     print(f"   ✅ Enhanced profile data collected")
+                elif contact.get("deadline_skipped"):
+                    print("   ⏱️ Skipped at the deadline, modal data only")
                 else:
                     print(f"   ⚠️ Could not scrape profile")
             else:
                 print(f"   📋 Using modal data only")
 
             contacts.append(contact)
-
-    finally:
-        driver.quit()
     
     print(f"✅ Scraping complete: {len(contacts)} contacts collected")
     return contacts
 
+def open_guest_list(driver, event_url, max_users=MAX_USERS):
+    """Open the event's guest list and return the stream of basic contacts"""
+    # Visit event page
+    with metrics.EVENT_PAGE_LOAD_SECONDS.time():
+        open_event_page(driver, event_url)
+
+    # Open guest list modal
+    guest_list_start = time.perf_counter()
+    if GUEST_LIST_MODE == "network":
+        flush_network_log(driver)
+    wait = WebDriverWait(driver, 10)
+    try:
+        guest_trigger = wait.until(EC.element_to_be_clickable((By.XPATH, "//div[contains(text(), 'others')]")))
+        guest_trigger.click()
+    except TimeoutException:
+        print("⚠️ Could not find guest list trigger, trying alternative selectors...")
+        # Try alternative selectors for guest list
+        guest_triggers = [
+            "//div[contains(text(), 'guest')]",
+            "//div[contains(text(), 'attendee')]",
+            "//button[contains(text(), 'guest')]"
+        ]
+        for selector in guest_triggers:
+            try:
+                guest_trigger = driver.find_element(By.XPATH, selector)
+                guest_trigger.click()
+                break
+            except:
+                continue
+
+    guests = None
+    source = "network"
+    if GUEST_LIST_MODE == "network":
+        guests = capture_guest_list(driver, extract_socials, max_users, rate_limiter=rate_limiter)
+    if guests is None:
+        source = "modal"
+        guests = iter_modal_guests(driver, extract_socials, max_users, scroll_wait=MODAL_SCROLL_WAIT)
+    return metrics.observe_stream(metrics.GUEST_LIST_SECONDS, guests, guest_list_start, source=source)
+
+def open_event_page(driver, event_url):
+    """Load the event page, picking up refreshed cookies once if Luma shows its sign-in page"""
+    for attempt in range(2):
+        rate_limiter.navigate(driver, event_url)
+        print(f"📄 Page title after login: {driver.title}")
+        wait_for_event_page(driver)
+        if not is_logged_out_url(driver.current_url):
+            return
+        print("🔒 Event page redirected to sign-in")
+        if attempt or not luma_session.report_logged_out():
+            raise SessionExpiredError(f"Luma session expired: export fresh cookies to {luma_session.cookies_file}")
+        luma_session.apply_to_driver(driver)
+
+def build_contact(basic_contact, profile_data):
+    """Merge modal data with scraped profile data into the contact sent to n8n"""
+    contact = {
+        "name": basic_contact["name"],
+        "profile_url": basic_contact["profile_url"],
+        "profile_scraped": False,
+        **basic_contact["modal_socials"]
+    }
+    if basic_contact.get("guest_status"):
+        contact["guest_status"] = basic_contact["guest_status"]  # new / changed / unchanged since last scrape
+    if basic_contact.get("deadline_skipped"):
+        contact["deadline_skipped"] = True  # Profile visit dropped at the request's deadline
+    if PROFILE_SCRAPING_ENABLED and basic_contact["profile_url"] and profile_data:
+        contact.update(profile_data)
+        contact["profile_scraped"] = True
+    return contact
+
+def acquire_profile_helpers():
+    """Check out up to PROFILE_CONCURRENCY - 1 idle pooled drivers without blocking"""
+    helpers = []
+    for _ in range(PROFILE_CONCURRENCY - 1):
+        helper = driver_pool.try_acquire()
+        if helper is None:
+            break
+        helpers.append(helper)
+    return helpers
+
+def scrape_profiles(driver, guests, force_refresh=False, on_contact=None, diff=None, run=None, intent_terms=(),
+                    deadline=None):
+    """Fetch profiles for a stream of basic contacts; returns (basic_contacts, profile_results) in guest-list order"""
+    basic_contacts = []
+    cache_hits = 0
+
+    def emit(idx):
+        profile_data = stage.results.get(idx, {})
+        if idx in stage.skipped:
+            basic_contacts[idx]["deadline_skipped"] = True  # Not checkpointed, so a resume visits it
+        elif run:
+            run.save_profile(idx, profile_data)
+        if on_contact:
+            on_contact(idx, build_contact(basic_contacts[idx], profile_data))
+
+    def scrape_and_cache(driver, url):
+        profile_data = scrape_user_profile(driver, url)
+        profile_cache.put(url, profile_data)
+        return profile_data
+
+    stage = ProfileFetchStage(scrape_and_cache, on_result=emit, recycle=driver_pool.recycle_if_needed,
+                              deadline=deadline)
+    http_mode = PROFILE_FETCH_MODE == "http"
+    helpers = [] if http_mode else acquire_profile_helpers()
+    for helper in helpers:
+        stage.add_driver(helper)
+
+    def fetch_over_http(idx, url, rank):
+        if stage.expired():
+            stage.skip(idx)
+            return
+        with metrics.PROFILE_SCRAPE_SECONDS.time(method="http"):
+            result = http_fetcher.fetch(url)
+        if result is None:
+            metrics.PROFILE_FAILURES.inc(method="http")
+            stage.submit(idx, url, priority=rank)  # Fall back to Chrome
+        else:
+            metrics.PROFILES_SCRAPED.inc(method="http")
+            profile_cache.put(url, result)
+            stage.set_result(idx, result)
+
+    # HTTP fetches are queued by intent match too: each task takes the best guest waiting, not its own
+    http_queue = queue.PriorityQueue()
+    http_order = itertools.count()
+    def fetch_next_over_http():
+        _, _, idx, url, rank = http_queue.get_nowait()
+        fetch_over_http(idx, url, rank)
+
+    executor = ThreadPoolExecutor(max_workers=HTTP_PROFILE_CONCURRENCY) if http_mode else None
+    def visit(idx, url, rank):
+        if executor:
+            http_queue.put((-rank, next(http_order), idx, url, rank))
+            executor.submit(fetch_next_over_http)
+        else:
+            stage.submit(idx, url, priority=rank)
+
+    # With a deadline the whole guest list is read first, so the budget goes to the best matches overall
+    deferred = []
+    try:
+        for idx, contact in enumerate(guests):
+            basic_contacts.append(contact)
+            url = contact["profile_url"]
+            reused = None
+            if diff:
+                contact["guest_status"], reused = diff.classify(idx, contact)
+            if run and not reused:
+                reused = run.done_profile(contact)
+            if not PROFILE_SCRAPING_ENABLED or not url:
+                emit(idx)  # Modal data only, already final
+                continue
+            if reused:
+                cache_hits += 1
+                stage.set_result(idx, reused)
+                continue
+            changed = contact.get("guest_status") == "changed"
+            cached = None if force_refresh or changed else profile_cache.get_entry(url)
+            if cached:
+                cache_hits += 1
+                if diff:
+                    diff.note_cached(contact, cached[0])  # The snapshot ages it from the original scrape
+                stage.set_result(idx, cached[1])
+            elif deadline:
+                deferred.append((priority(contact, intent_terms), idx, url))
+            else:
+                visit(idx, url, priority(contact, intent_terms))
+        for rank, idx, url in sorted(deferred, key=lambda item: -item[0]):
+            visit(idx, url, rank)
+
+        if executor:
+            executor.shutdown(wait=True)
+            print(f"⚡ {len(stage.results) - cache_hits} profiles parsed over HTTP, {stage.pending()} falling back to Chrome")
+            if stage.pending() > 1:
+                helpers = acquire_profile_helpers()
+                for helper in helpers:
+                    stage.add_driver(helper)
+
+        print(f"🔍 Visiting remaining profiles with {len(helpers) + 1} drivers")
+        stage.finish(driver)
+    finally:
+        if executor:
+            executor.shutdown(wait=True)
+        stage.cancel()  # No-op after finish(); stops helper threads on errors
+        for helper in helpers:
+            driver_pool.release(helper)
+
+    profile_results = [stage.results.get(idx, {}) for idx in range(len(basic_contacts))]
+    return basic_contacts, profile_results
+
 def scrape_user_profile(driver, profile_url, max_retries=2):
     """Visit user profile and extract comprehensive social links and bio data"""
     if not profile_url:
         return {}
     
+    with metrics.PROFILE_SCRAPE_SECONDS.time(method="chrome"):
+        profile_data = _scrape_user_profile(driver, profile_url, max_retries)
+    if profile_data:
+        metrics.PROFILES_SCRAPED.inc(method="chrome")
+    else:
+        metrics.PROFILE_FAILURES.inc(method="chrome")
+    return profile_data
+
+def _scrape_user_profile(driver, profile_url, max_retries):
     for attempt in range(max_retries):
         try:
             print(f"   🔍 Visiting profile: {profile_url} (attempt {attempt+1})")
             
             # Visit profile page
-            driver.get(profile_url)
-            time.sleep(2)  # Rate limiting
-            
-            profile_data = {}
+            rate_limiter.navigate(driver, profile_url)
+            wait_for_profile(driver)
             
-            # Extract bio/description
-            try:
-                bio_selectors = [
-                    ".bio", ".description", ".about", 
-                    "[data-testid='bio']", ".user-bio",
-                    "//div[contains(@class, 'bio')]",
-                    "//div[contains(@class, 'description')]"
-                ]
-                for selector in bio_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            bio_elem = driver.find_element(By.XPATH, selector)
-                        else:
-                            bio_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                        if bio_elem and bio_elem.text.strip():
-                            profile_data["bio"] = bio_elem.text.strip()
-                            break
-                    except:
-                        continue
-            except:
-                pass
+            # Bio, title, every anchor href and URLs embedded in text, in one round trip
+            page = extract_profile_page(driver)
 
-            # Extract title/job
-            try:
-                title_selectors = [
-                    ".title", ".job-title", ".position",
-                    ".headline", ".user-title",
-                    "//div[contains(@class, 'title')]",
-                    "//div[contains(@class, 'job')]"
-                ]
-                for selector in title_selectors:
-                    try:
-                        if selector.startswith("//"):
-                            title_elem = driver.find_element(By.XPATH, selector)
-                        else:
-                            title_elem = driver.find_element(By.CSS_SELECTOR, selector)
-                        if title_elem and title_elem.text.strip():
-                            profile_data["title"] = title_elem.text.strip()
-                            break
-                    except:
-                        continue
-            except:
-                pass
-
-            # Extract ALL links from profile page
-            all_links = []
-            try:
-                link_elements = driver.find_elements(By.TAG_NAME, "a")
-                all_links = [link.get_attribute("href") for link in link_elements if link.get_attribute("href")]
-                
-                # Also check for links in text (common pattern on Luma)
-                text_elements = driver.find_elements(By.XPATH, "//*[contains(text(), 'http')]")
-                for elem in text_elements:
-                    text = elem.text
-                    # Extract URLs from text using regex
-                    urls = re.findall(r'https?://[^\s<>"]+', text)
-                    all_links.extend(urls)
-                    
-            except Exception as e:
-                print(f"   ⚠️ Error extracting links: {e}")
+            profile_data = {}
+            if page["bio"]:
+                profile_data["bio"] = page["bio"]
+            if page["title"]:
+                profile_data["title"] = page["title"]
+            all_links = page["hrefs"] + page["text_urls"]
 
             # Enhanced social extraction
             if all_links:
@@ -274,7 +633,8 @@ def scrape_user_profile(driver, profile_url, max_retries=2):
             print(f"   ❌ Profile scraping attempt {attempt+1} failed: {e}")
             if attempt == max_retries - 1:
                 return {}
-            time.sleep(1)
+            metrics.RETRIES.inc(stage="profile")
+            # No pause needed: the retry's own page wait paces it
     
     return {}
 
@@ -301,100 +661,19 @@ def extract_socials(links):
 
 def extract_enhanced_socials(links):
     """Enhanced social media extraction with more platforms and better detection"""
-    socials = {
-        "linkedin_url": None,
-        "twitter_url": None,
-        "instagram_url": None,
-        "github_url": None,
-        "youtube_url": None,
-        "tiktok_url": None,
-        "facebook_url": None,
-        "medium_url": None,
-        "website_url": None,
-        "other_social_links": []
-    }
-    
-    # Clean and deduplicate links
-    clean_links = []
-    for href in links:
-        if not href or not isinstance(href, str):
-            continue
-        href = href.strip()
-        if href.startswith("http") and "lu.ma" not in href:
-            clean_links.append(href)
-    
-    clean_links = list(set(clean_links))  # Remove duplicates
-    
-    # Social platform patterns
-    patterns = {
-        "linkedin_url": [r"linkedin\.com/in/", r"linkedin\.com/company/"],
-        "twitter_url": [r"(?:twitter\.com|x\.com)/", r"t\.co/"],
-        "instagram_url": [r"instagram\.com/"],
-        "github_url": [r"github\.com/"],
-        "youtube_url": [r"youtube\.com/", r"youtu\.be/"],
-        "tiktok_url": [r"tiktok\.com/"],
-        "facebook_url": [r"facebook\.com/", r"fb\.com/"],
-        "medium_url": [r"medium\.com/", r".*\.medium\.com"],
-    }
-    
-    # Categorize links
-    for href in clean_links:
-        categorized = False
-        
-        # Check against social patterns
-        for social_key, platform_patterns in patterns.items():
-            for pattern in platform_patterns:
-                if re.search(pattern, href, re.IGNORECASE):
-                    if not socials[social_key]:  # Only set if not already found
-                        socials[social_key] = href
-                    categorized = True
-                    break
-            if categorized:
-                break
-        
-        # If not a recognized social platform, check if it's a personal website
-        if not categorized:
-            domain = urlparse(href).netloc.lower()
-            # Skip common non-personal domains
-            skip_domains = [
-                'google.com', 'gmail.com', 'outlook.com', 'yahoo.com',
-                'zoom.us', 'calendly.com', 'eventbrite.com',
-                'amazon.com', 'apple.com', 'microsoft.com'
-            ]
-            if not any(skip in domain for skip in skip_domains):
-                if not socials["website_url"]:  # Use first non-social link as website
-                    socials["website_url"] = href
-                else:
-                    socials["other_social_links"].append(href)
-    
-    return socials
+    return classify_links(links)
 
 def send_to_n8n(payload):
-    """Send scraped data to n8n webhook for AI processing"""
-    headers = {
-        "Content-Type": "application/json",
-        "User-Agent": "Luma-Scraper/1.0"
-    }
-    
-    try:
-        print(f"🚀 Sending {len(payload.get('contacts', []))} contacts to n8n...")
-        res = requests.post(N8N_WEBHOOK, headers=headers, json=payload, timeout=30)
-        
-        if res.status_code == 200:
-            print(f"✅ Successfully sent to n8n: {len(payload.get('contacts', []))} contacts")
-        else:
-            print(f"❌ n8n webhook error: {res.status_code} - {res.text}")
-            raise Exception(f"n8n webhook failed: HTTP {res.status_code}")
-            
-    except requests.exceptions.Timeout:
-        print("❌ n8n webhook timeout after 30 seconds")
-        raise Exception("n8n webhook timeout")
-    except requests.exceptions.ConnectionError:
-        print("❌ Could not connect to n8n webhook")
-        raise Exception("n8n webhook connection failed")
-    except Exception as e:
-        print(f"❌ n8n webhook error: {e}")
-        raise
+    """Queue scraped data for the n8n webhook; the outbox delivers it with retries"""
+    message_id = webhook_outbox.enqueue(N8N_WEBHOOK, payload)
+    print(f"📮 Queued {len(payload.get('contacts', []))} contacts for n8n (outbox message {message_id})")
+    return message_id
+
+@app.route('/outbox/retry', methods=['POST'])
+def retry_dead_deliveries():
+    """Requeue dead-lettered webhook deliveries"""
+    requeued = webhook_outbox.retry_dead()
+    return jsonify({"requeued": requeued, **webhook_outbox.stats()}), 200
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -402,15 +681,59 @@ def health_check():
         "status": "healthy",
         "n8n_webhook": N8N_WEBHOOK,
         "max_users": MAX_USERS,
-        "profile_scraping": PROFILE_SCRAPING_ENABLED
+        "profile_scraping": PROFILE_SCRAPING_ENABLED,
+        "job_queue": job_queue.stats(),
+        "luma_session": luma_session.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "driver_pool": driver_pool.stats(),
+        "driver_memory": driver_pool.memory_stats(),
+        "profile_cache": profile_cache.stats(),
+        "event_snapshots": event_snapshots.stats(),
+        "run_checkpoints": run_checkpoints.stats(),
+        "contact_store": contact_store.stats(),
+        "event_cache": event_cache.stats(),
+        "webhook_outbox": webhook_outbox.stats()
     }), 200
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    pool = driver_pool.stats()
+    metrics.ACTIVE_DRIVERS.set(pool["live"] - pool["idle"])
+    metrics.LIVE_DRIVERS.set(pool["live"])
+    metrics.DRIVER_MEMORY_MB.set(driver_pool.memory_stats()["total_rss_mb"] or 0)
+    jobs = job_queue.stats()
+    metrics.QUEUED_JOBS.set(jobs["queued"])
+    metrics.RUNNING_JOBS.set(jobs["jobs"].get("running", 0))
+    return Response(metrics.render_metrics(), content_type=metrics.CONTENT_TYPE)
+
 @app.route('/config', methods=['GET'])
 def get_config():
     return jsonify({
         "n8n_webhook": N8N_WEBHOOK,
         "max_users": MAX_USERS,
-        "profile_scraping_enabled": PROFILE_SCRAPING_ENABLED
+        "profile_scraping_enabled": PROFILE_SCRAPING_ENABLED,
+        "delivery_mode": DELIVERY_MODE,
+        "delivery_batch_size": DELIVERY_BATCH_SIZE,
+        "scrape_workers": SCRAPE_WORKERS,
+        "max_queued_jobs": MAX_QUEUED_JOBS,
+        "guest_list_mode": GUEST_LIST_MODE,
+        "resource_blocking": RESOURCE_BLOCKING,
+        "resource_allowlist": RESOURCE_ALLOWLIST,
+        "profile_fetch_mode": PROFILE_FETCH_MODE,
+        "profile_bio_selectors": BIO_SELECTORS,
+        "profile_title_selectors": TITLE_SELECTORS,
+        "profile_concurrency": PROFILE_CONCURRENCY,
+        "driver_pool_size": DRIVER_POOL_SIZE,
+        "driver_max_uses": DRIVER_MAX_USES,
+        "driver_max_navigations": DRIVER_MAX_NAVIGATIONS,
+        "driver_max_rss_mb": DRIVER_MAX_RSS_MB,
+        "profile_cache_ttl": PROFILE_CACHE_TTL,
+        "event_cache_ttl": EVENT_CACHE_TTL,
+        "incremental_scrape": INCREMENTAL_SCRAPE,
+        "delivery_delta_only": DELIVERY_DELTA_ONLY,
+        "rank_top_k": RANK_TOP_K,
+        "deadline_max_users": DEADLINE_MAX_USERS,
+        "prioritize_profiles": PRIORITIZE_PROFILES
     }), 200
 
 if __name__ == "__main__":
@@ -418,4 +741,10 @@ if __name__ == "__main__":
     print(f"📡 n8n Webhook: {N8N_WEBHOOK}")
     print(f"👥 Max Users: {MAX_USERS}")
     print(f"🔍 Profile Scraping: {'Enabled' if PROFILE_SCRAPING_ENABLED else 'Disabled'}")
-    app.run(host="0.0.0.0", port=10000, debug=True)
+    print(f"🧵 Scrape Workers: {SCRAPE_WORKERS}")
+    webhook_outbox.start()
+    luma_session.validate()
+    driver_pool.start()
+    job_queue.start()
+    # The reloader would fork a second process with its own workers
+    app.run(host="0.0.0.0", port=10000, debug=True, use_reloader=False)
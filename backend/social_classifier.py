@@ -0,0 +1,139 @@
+# Single-pass social link classifier: parse each URL once and dispatch on its host
+
+from functools import lru_cache
+
+SOCIAL_KEYS = [
+    "linkedin_url", "twitter_url", "instagram_url", "github_url", "youtube_url",
+    "tiktok_url", "facebook_url", "medium_url",
+]
+
+# Registered domain -> (social key, required path prefixes or None for any path).
+# A host matches a domain when it equals it or is a subdomain of it.
+PLATFORM_DOMAINS = {
+    "linkedin.com": ("linkedin_url", ("/in/", "/company/")),
+    "twitter.com": ("twitter_url", None),
+    "x.com": ("twitter_url", None),
+    "t.co": ("twitter_url", None),
+    "instagram.com": ("instagram_url", None),
+    "github.com": ("github_url", None),
+    "youtube.com": ("youtube_url", None),
+    "youtu.be": ("youtube_url", None),
+    "tiktok.com": ("tiktok_url", None),
+    "facebook.com": ("facebook_url", None),
+    "fb.com": ("facebook_url", None),
+    "medium.com": ("medium_url", None),
+}
+
+# Common non-personal domains never reported as a website
+SKIP_DOMAINS = frozenset([
+    "google.com", "gmail.com", "outlook.com", "yahoo.com",
+    "zoom.us", "calendly.com", "eventbrite.com",
+    "amazon.com", "apple.com", "microsoft.com",
+])
+
+# Links back to Luma itself carry no social signal
+LUMA_DOMAINS = frozenset(["lu.ma", "luma.com"])
+
+# Suffix index: every domain above -> its classification, built once at import
+_DOMAIN_INDEX = {}
+for _domain, (_key, _prefixes) in PLATFORM_DOMAINS.items():
+    _DOMAIN_INDEX[_domain] = ("social", _key, _prefixes)
+for _domain in SKIP_DOMAINS:
+    _DOMAIN_INDEX[_domain] = ("skip", None, None)
+for _domain in LUMA_DOMAINS:
+    _DOMAIN_INDEX[_domain] = ("luma", None, None)
+
+
+@lru_cache(maxsize=65536)
+def _lookup_host(host):
+    """Most specific index entry for a host, walking its dot-separated suffixes (memoized)"""
+    while host:
+        entry = _DOMAIN_INDEX.get(host)
+        if entry:
+            return entry
+        dot = host.find(".")
+        if dot < 0:
+            return None
+        host = host[dot + 1:]
+    return None
+
+
+def _host_and_path(href):
+    """Lower-cased host and raw path of an http(s) URL, without a full urlsplit"""
+    scheme_end = href.find("://")
+    if scheme_end < 0 or href[:scheme_end].lower() not in ("http", "https"):
+        return None, None
+    rest = href[scheme_end + 3:]
+    end = len(rest)
+    for sep in "/?#":
+        i = rest.find(sep, 0, end)
+        if i >= 0:
+            end = i
+    authority = rest[:end].rpartition("@")[2]
+    host = authority.partition(":")[0].lower().rstrip(".")
+    return host, rest[end:]
+
+
+def classify_link(href):
+    """Classify one absolute URL.
+
+    Returns ("social", key), ("website", None), ("skip", None) or None for
+    values that are not http(s) URLs or point back to Luma.
+    """
+    if not href or not isinstance(href, str):
+        return None
+    href = href.strip()
+    if not href.startswith("http"):
+        return None
+    host, path = _host_and_path(href)
+    if not host:
+        return None
+
+    entry = _lookup_host(host)
+    if entry is None:
+        return ("website", None)
+    kind, key, prefixes = entry
+    if kind == "luma":
+        return None
+    if kind == "skip":
+        return ("skip", None)
+    if prefixes is None:
+        return ("social", key)
+    if path.lower().startswith(prefixes):
+        return ("social", key)
+    # e.g. linkedin.com/feed: a known host but not a profile link
+    return ("website", None)
+
+
+def classify_links(links):
+    """Same result shape as ``extract_enhanced_socials``.
+
+    Links are deduplicated in first-seen order; the first match per
+    platform wins, the first unrecognized non-skipped link becomes
+    ``website_url`` and the rest go to ``other_social_links``.
+    """
+    socials = dict.fromkeys(SOCIAL_KEYS)
+    socials["website_url"] = None
+    socials["other_social_links"] = []
+
+    seen = set()
+    for href in links:
+        if not isinstance(href, str):
+            continue
+        href = href.strip()
+        if href in seen:
+            continue
+        seen.add(href)
+        result = classify_link(href)
+        if result is None:
+            continue
+        kind, key = result
+        if kind == "social":
+            if not socials[key]:
+                socials[key] = href
+        elif kind == "website":
+            if not socials["website_url"]:
+                socials["website_url"] = href
+            else:
+                socials["other_social_links"].append(href)
+    return socials
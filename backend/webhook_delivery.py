@@ -0,0 +1,90 @@
+# Incremental delivery of enriched contacts to the n8n webhook in sequenced batches
+
+import json
+import threading
+import time
+import uuid
+
+
+class BatchDelivery:
+    """Streams contacts to the webhook as they are enriched.
+
+    Contacts are buffered into batches of ``batch_size`` and handed to the
+    webhook outbox, which persists and delivers them in order in the
+    background, so scraping never waits on the webhook. Every POST carries
+    the ``run_id`` and a ``sequence`` number; the last one is a
+    ``"complete"`` marker with the final totals. ``fmt`` is ``"json"`` (one
+    JSON object per batch) or ``"ndjson"`` (one line per contact).
+    """
+
+    def __init__(self, outbox, webhook_url, base_payload, batch_size=10, fmt="json", run_id=None):
+        self.outbox = outbox
+        self.webhook_url = webhook_url
+        self.base_payload = base_payload
+        self.batch_size = max(1, batch_size)
+        self.fmt = fmt
+        self.run_id = run_id or uuid.uuid4().hex
+        self.message_ids = []
+        self._buffer = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def add(self, index, contact):
+        """Queue one enriched contact (``index`` is its position in the guest list)"""
+        with self._lock:
+            self._buffer.append({**contact, "index": index})
+            if len(self._buffer) >= self.batch_size:
+                self._flush_locked()
+
+    def complete(self, total_found, **fields):
+        """Flush remaining contacts and queue the completion marker (``fields`` are added to it)"""
+        self._finish({"status": "complete", "total_found": total_found, **fields})
+
+    def abort(self, error):
+        """Queue a failed completion marker after a scrape error"""
+        self._finish({"status": "failed", "error": str(error)})
+
+    def stats(self):
+        return {
+            "run_id": self.run_id,
+            "batches_queued": len(self.message_ids),
+        }
+
+    def _finish(self, fields):
+        with self._lock:
+            self._flush_locked()
+            self._enqueue(self._envelope("complete", **fields, batches=self._sequence))
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        self._enqueue(self._envelope("batch", contacts=batch))
+
+    def _envelope(self, kind, **fields):
+        return {
+            **self.base_payload,
+            "run_id": self.run_id,
+            "sequence": self._sequence,
+            "type": kind,
+            "sent_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            **fields
+        }
+
+    def _enqueue(self, message):
+        body, content_type = self._encode(message)
+        self.message_ids.append(
+            self.outbox.enqueue(self.webhook_url, body, content_type, group_key=self.run_id)
+        )
+        print(f"📦 Queued {message['type']} #{message['sequence']} for run {self.run_id[:8]}")
+        self._sequence += 1
+
+    def _encode(self, message):
+        if self.fmt != "ndjson":
+            return json.dumps(message), "application/json"
+        message = dict(message)
+        contacts = message.pop("contacts", None)
+        if contacts is None:
+            return json.dumps(message) + "\n", "application/x-ndjson"
+        lines = [json.dumps({**message, "contact": contact}) for contact in contacts]
+        return "\n".join(lines) + "\n", "application/x-ndjson"
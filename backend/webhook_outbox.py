@@ -0,0 +1,201 @@
+# Durable webhook outbox: deliveries are persisted in SQLite and drained with retry/backoff
+
+from requests.adapters import HTTPAdapter
+from metrics import WEBHOOK_DELIVERY_SECONDS, RETRIES
+import json
+import sqlite3
+import threading
+import time
+import requests
+
+HEADERS = {
+    "User-Agent": "Luma-Scraper/1.0"
+}
+
+
+class WebhookOutbox:
+    """Persistent queue of webhook POSTs drained by a background sender.
+
+    Messages are written to SQLite before any network call, so scraped
+    results survive webhook outages and process restarts. The sender reuses
+    one keep-alive ``requests.Session``, retries failures with exponential
+    backoff and moves a message to the dead-letter state after
+    ``max_attempts``. Messages sharing a ``group_key`` (e.g. the batches of
+    one run) are delivered strictly in order.
+    """
+
+    def __init__(self, path="webhook_outbox.db", max_attempts=8, backoff_base=2.0,
+                 backoff_max=600.0, timeout=30):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.headers.update(HEADERS)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sender = None
+        self._sent = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " url TEXT NOT NULL,"
+            " body TEXT NOT NULL,"
+            " content_type TEXT NOT NULL,"
+            " group_key TEXT,"
+            " status TEXT NOT NULL DEFAULT 'pending',"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " next_attempt_at REAL NOT NULL,"
+            " last_error TEXT,"
+            " created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS outbox_ready ON outbox (status, next_attempt_at)")
+        # A crash mid-send leaves rows claimed; deliver them again (at-least-once)
+        self._db.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+        self._db.commit()
+
+    def enqueue(self, url, payload, content_type="application/json", group_key=None):
+        """Persist one POST; ``payload`` is a dict (sent as JSON) or a preencoded string"""
+        body = payload if isinstance(payload, str) else json.dumps(payload)
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO outbox (url, body, content_type, group_key, next_attempt_at, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (url, body, content_type, group_key, now, now)
+            )
+            self._db.commit()
+            message_id = cursor.lastrowid
+        self._wakeup.set()
+        return message_id
+
+    def start(self):
+        """Start the background sender thread (idempotent)"""
+        with self._lock:
+            if self._sender:
+                return
+            self._sender = threading.Thread(target=self._send_loop, name="webhook-outbox", daemon=True)
+            self._sender.start()
+
+    def flush(self, timeout=60):
+        """Deliver ready messages on the calling thread until none are left or ``timeout`` passes.
+
+        Returns the number of messages still pending (e.g. backing off).
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if not self._deliver_next():
+                break
+        return self.stats()["pending"]
+
+    def status(self, message_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, attempts, last_error FROM outbox WHERE id = ?", (message_id,)
+            ).fetchone()
+        if not row:
+            return {"status": "sent"}  # Delivered rows are removed
+        return {"status": row[0], "attempts": row[1], "last_error": row[2]}
+
+    def retry_dead(self):
+        """Move every dead-lettered message back to pending"""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'dead'",
+                (time.time(),)
+            )
+            self._db.commit()
+        self._wakeup.set()
+        return cursor.rowcount
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        return {
+            "pending": counts.get("pending", 0) + counts.get("sending", 0),
+            "dead": counts.get("dead", 0),
+            "sent": self._sent,
+        }
+
+    def _claim_next(self):
+        # Oldest ready message that has no earlier undelivered message in its group
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, url, body, content_type, attempts FROM outbox o"
+                " WHERE status = 'pending' AND next_attempt_at <= ?"
+                " AND NOT EXISTS (SELECT 1 FROM outbox p WHERE p.group_key = o.group_key"
+                "   AND p.id < o.id AND p.status IN ('pending', 'sending'))"
+                " ORDER BY id LIMIT 1",
+                (time.time(),)
+            ).fetchone()
+            if not row:
+                return None
+            claimed = self._db.execute(
+                "UPDATE outbox SET status = 'sending' WHERE id = ? AND status = 'pending'", (row[0],)
+            ).rowcount
+            self._db.commit()
+            return row if claimed else None
+
+    def _deliver_next(self):
+        row = self._claim_next()
+        if not row:
+            return False
+        message_id, url, body, content_type, attempts = row
+        attempts += 1
+        start = time.perf_counter()
+        try:
+            res = self.session.post(url, data=body.encode("utf-8"), timeout=self.timeout,
+                                    headers={"Content-Type": content_type})
+            error = None if res.status_code == 200 else f"HTTP {res.status_code} - {res.text[:200]}"
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+        WEBHOOK_DELIVERY_SECONDS.observe(time.perf_counter() - start,
+                                         outcome="sent" if error is None else "failed")
+
+        with self._lock:
+            if error is None:
+                self._db.execute("DELETE FROM outbox WHERE id = ?", (message_id,))
+                self._sent += 1
+                print(f"✅ Outbox message {message_id} delivered (attempt {attempts})")
+            elif attempts >= self.max_attempts:
+                self._db.execute(
+                    "UPDATE outbox SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+                    (attempts, error, message_id)
+                )
+                print(f"💀 Outbox message {message_id} dead-lettered after {attempts} attempts: {error}")
+            else:
+                RETRIES.inc(stage="webhook")
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (attempts - 1)))
+                self._db.execute(
+                    "UPDATE outbox SET status = 'pending', attempts = ?, last_error = ?, next_attempt_at = ?"
+                    " WHERE id = ?",
+                    (attempts, error, time.time() + delay, message_id)
+                )
+                print(f"❌ Outbox message {message_id} failed ({error}), retrying in {delay:.0f}s")
+            self._db.commit()
+        return True
+
+    def _next_wait(self):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(next_attempt_at) FROM outbox WHERE status = 'pending'"
+            ).fetchone()
+        if not row or row[0] is None:
+            return None
+        # Floor avoids spinning on ready rows held back by an earlier message in their group
+        return max(0.5, row[0] - time.time())
+
+    def _send_loop(self):
+        while True:
+            try:
+                if self._deliver_next():
+                    continue
+                self._wakeup.wait(self._next_wait())
+                self._wakeup.clear()
+            except Exception as e:
+                print(f"❌ Outbox sender error: {e}")
+                time.sleep(1)
@@ -3,15 +3,70 @@ export interface ScrapeRequest {
   event_url: string;
   description: string;
   callback_url: string;
+  force_refresh?: boolean;
+  delta_only?: boolean;
+  top_k?: number;
+  deadline_ms?: number;
 }
 
 export interface ScrapeResponse {
-  status: 'success' | 'error';
+  status: 'queued' | 'error';
   message: string;
-  contacts_found?: number;
+  job_id?: string;
+  run_id?: string;
+  status_url?: string;
   error?: string;
 }
 
+export interface ScrapeRun {
+  run_id: string;
+  event_url: string;
+  status: 'running' | 'complete' | 'partial' | 'failed' | 'interrupted';
+  guest_list_complete: boolean;
+  attempts: number;
+  error: string | null;
+  created_at: string;
+  updated_at: string;
+  guests: number;
+  profiles_done: number;
+}
+
+export interface ScrapeJob {
+  job_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+  error: string | null;
+  result: {
+    message: string;
+    contacts_found: number;
+    contacts_sent: number;
+    enhanced_profiles: number;
+    run_id: string;
+    resumed: boolean;
+    diff?: GuestListDiff;
+    deadline?: DeadlineSummary;
+    contacts: Contact[];
+  } | null;
+}
+
+export interface DeadlineSummary {
+  deadline_ms: number;
+  partial: boolean;
+  profiles_skipped: number;
+}
+
+export interface GuestListDiff {
+  first_scrape: boolean;
+  new: number;
+  changed: number;
+  unchanged: number;
+  profiles_reused: number;
+  removed: { name: string; profile_url: string | null }[];
+  compared_at: string;
+}
+
 export interface Contact {
   name: string;
   profile_url?: string;
@@ -19,6 +74,25 @@ export interface Contact {
   twitter_url?: string;
   instagram_url?: string;
   other_links?: string[];
+  guest_status?: 'new' | 'changed' | 'unchanged';
+  profile_scraped?: boolean;
+  deadline_skipped?: boolean;
+  index?: number;
+  match_score?: number;
+  match_terms?: string[];
+}
+
+export interface StoredContact extends Contact {
+  title?: string | null;
+  bio?: string | null;
+  first_seen: string;
+  last_seen: string;
+  events: { event_url: string; seen_at: string }[];
+}
+
+export interface ContactQueryResponse {
+  count: number;
+  contacts: StoredContact[];
 }
 
 // Clay Response Types (what comes back to frontend)